@@ -0,0 +1,60 @@
+"""
+Check listing serialization: FastAPI's response_model path (validation, jsonable_encoder, json.dumps)
+against FastJSONResponse returned by the route.
+
+    python -m benchmarks.json_render --checks 100 --products 20
+
+Both get the same page of CheckResponse objects and must produce the same bytes.
+"""
+import argparse
+import asyncio
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from benchmarks.text_render import best_of, make_checks
+from src.schemas.check import CheckResponseList
+from src.services.json_response import FastJSONResponse
+
+response_field = create_model_field(name="Response_get_checks", type_=CheckResponseList, mode="serialization")
+
+
+def make_page(checks: int, products: int) -> dict:
+    entries = make_checks(checks, products)
+    for check in entries:
+        check.business_name = "ФОП Бенчмарк"
+    return {"entries": entries, "page": 0, "per_page": checks, "total": checks * 10, "next_cursor": None}
+
+
+def default_body(page: dict, loop: asyncio.AbstractEventLoop) -> bytes:
+    content = loop.run_until_complete(serialize_response(field=response_field, response_content=page))
+    return JSONResponse(content).body
+
+
+def fast_body(page: dict) -> bytes:
+    return FastJSONResponse(CheckResponseList.model_construct(**page)).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=100, help="Checks on the page")
+    parser.add_argument("--products", type=int, default=20, help="Maximum products per check")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    page = make_page(args.checks, args.products)
+    loop = asyncio.new_event_loop()
+    default, expected = best_of(default_body, args.repeat, page, loop)
+    loop.close()
+    fast, result = best_of(fast_body, args.repeat, page)
+    assert result == expected, "FastJSONResponse output differs from the response_model serialization"
+
+    print(f"checks:           {args.checks}, {len(expected):,} bytes")
+    print(f"response_model:   {default * 1000:.2f} ms")
+    print(f"FastJSONResponse: {fast * 1000:.2f} ms")
+    print(f"speedup:          {default / fast:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+In-process load driver for the check API.
+
+    python -m benchmarks.load --checks 5000 --products 5 --requests 500 --concurrency 8
+    python -m benchmarks.load --scenarios find,select --requests 2000
+
+A temporary SQLite database is seeded with --checks checks of one user (deterministic for a --seed),
+then every scenario sends --requests requests from --concurrency clients through the ASGI transport
+and reports latency percentiles and throughput. Views and QR codes are requested for random checks,
+so the view cache warms up during the run like it would in production.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Awaitable, Callable
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.login_storm import percentile
+from main import app
+from src.database.db import get_db, get_read_db
+from src.database.models import Base
+from src.repository.check import create_checks
+from src.schemas.check import CheckRequest
+from src.services.view_cache import view_cache
+
+USER = {"username": "load", "email": "load@example.com", "password": "12345678", "business_name": "FOP Load"}
+SCENARIOS = ("create", "find", "select", "view", "qr")
+
+
+def random_check(rnd: random.Random, products: int) -> dict:
+    items = [{"name": f"Product {rnd.randint(1, 500)}", "price": rnd.randint(100, 100000) / 100,
+              "quantity": rnd.randint(1, 5)} for _ in range(rnd.randint(1, products))]
+    total = sum(item["price"] * item["quantity"] for item in items)
+    return {"payment": {"type": rnd.choice(["cash", "cashless"]), "amount": round(total + 100, 2)},
+            "products": items}
+
+
+async def seed(session_maker: async_sessionmaker, user_id: int, checks: int, products: int,
+               rnd: random.Random) -> None:
+    async with session_maker() as db:
+        for start in range(0, checks, 1000):
+            batch = []
+            for _ in range(min(1000, checks - start)):
+                body = CheckRequest.model_validate(random_check(rnd, products))
+                total = sum(item.price * item.quantity for item in body.products)
+                batch.append((body, total, body.payment.amount - total))
+            await create_checks(batch, user_id, db)
+
+
+async def drive(name: str, send: Callable[[], Awaitable[httpx.Response]], requests: int, concurrency: int) -> None:
+    latencies: list[float] = []
+    remaining = iter(range(requests))
+
+    async def client_loop():
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await send()
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code < 400, f"{name}: {response.status_code} {response.text}"
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    print(f"{name:<8} p50={statistics.median(latencies) * 1000:7.2f} ms  "
+          f"p99={percentile(latencies, 0.99) * 1000:7.2f} ms  "
+          f"throughput={len(latencies) / elapsed:8.1f} req/s")
+
+
+async def run(args: argparse.Namespace) -> None:
+    rnd = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'load.db')}",
+                                     connect_args={"timeout": 60})
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def override_get_db():
+            async with session_maker() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
+        view_cache.clear()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+            await client.post("/api/auth/signup", json=USER)
+            response = await client.post("/api/auth/login", json={"email": USER["email"], "password": USER["password"]})
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            started = time.perf_counter()
+            # The database is new, so the user signed up above has id 1
+            await seed(session_maker, 1, args.checks, args.products, rnd)
+            print(f"seeded {args.checks} checks in {time.perf_counter() - started:.1f}s")
+
+            def check_id() -> int:
+                return rnd.randint(1, args.checks)
+
+            senders = {
+                "create": lambda: client.post("/api/check/", json=random_check(rnd, args.products), headers=headers),
+                "find": lambda: client.get(f"/api/check/find/{check_id()}", headers=headers),
+                "select": lambda: client.get(f"/api/check/select?page={rnd.randint(0, max(args.checks // 10 - 1, 0))}",
+                                             headers=headers),
+                "view": lambda: client.get(f"/{check_id()}/{rnd.choice(['html', 'txt'])}"),
+                "qr": lambda: client.get(f"/{check_id()}/qr-code"),
+            }
+            for name in args.scenarios:
+                await drive(name, senders[name], args.requests, args.concurrency)
+
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_read_db, None)
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=5000, help="size of the seeded dataset")
+    parser.add_argument("--products", type=int, default=5, help="maximum products per check")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="clients sending requests at once")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS),
+                        help=f"comma separated, from {','.join(SCENARIOS)}")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
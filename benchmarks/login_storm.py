@@ -0,0 +1,96 @@
+"""
+Latency of check creation while a burst of logins is hashing passwords on the same worker.
+
+    python -m benchmarks.login_storm --logins 40 --checks 200 --workers 4
+    python -m benchmarks.login_storm --logins 40 --checks 200 --workers 0   # bcrypt on the event loop
+
+The app runs in process on a temporary SQLite database, requests go through the ASGI transport,
+so all of them share one event loop like on a single uvicorn worker.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from main import app
+from src.database.db import get_db
+from src.database.models import Base
+from src.services.auth import auth_service
+from src.services.executor import BoundedExecutor
+
+USER = {"username": "storm", "email": "storm@example.com", "password": "12345678", "business_name": "FOP Storm"}
+CHECK = {"payment": {"amount": 100.0, "type": "cash"}, "products": [{"name": "Tea", "price": 20.5, "quantity": 2}]}
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(logins: int, checks: int, concurrency: int, workers: int) -> None:
+    auth_service.hash_executor = BoundedExecutor("password-hash", max_workers=workers)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}",
+                                     connect_args={"timeout": 60})
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, expire_on_commit=True)
+
+        async def override_get_db():
+            async with session_maker() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.post("/api/auth/signup", json=USER)
+            response = await client.post("/api/auth/login", json={"email": USER["email"], "password": USER["password"]})
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            await client.post("/api/check/", json=CHECK, headers=headers)
+
+            latencies: list[float] = []
+            remaining = iter(range(checks))
+
+            async def create_checks():
+                for _ in remaining:
+                    started = time.perf_counter()
+                    response = await client.post("/api/check/", json=CHECK, headers=headers)
+                    latencies.append(time.perf_counter() - started)
+                    assert response.status_code == 201, response.text
+
+            async def login():
+                response = await client.post("/api/auth/login",
+                                             json={"email": USER["email"], "password": USER["password"]})
+                assert response.status_code == 200, response.text
+
+            started = time.perf_counter()
+            await asyncio.gather(*(login() for _ in range(logins)),
+                                 *(create_checks() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+        app.dependency_overrides.pop(get_db, None)
+        await engine.dispose()
+    auth_service.hash_executor.shutdown()
+
+    print(f"hash workers: {workers or 'inline'}, logins: {logins}, checks: {checks}, concurrency: {concurrency}")
+    print(f"wall time: {elapsed:.2f}s, max hash queue depth: {auth_service.hash_executor.max_queue_depth}")
+    print("check creation latency, ms: "
+          f"p50={statistics.median(latencies) * 1000:.1f} "
+          f"p99={percentile(latencies, 0.99) * 1000:.1f} "
+          f"max={max(latencies) * 1000:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40, help="logins started at once")
+    parser.add_argument("--checks", type=int, default=200, help="checks created during the storm")
+    parser.add_argument("--concurrency", type=int, default=4, help="clients creating checks")
+    parser.add_argument("--workers", type=int, default=4, help="password hash threads, 0 hashes inline")
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.checks, args.concurrency, args.workers))
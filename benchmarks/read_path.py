@@ -0,0 +1,124 @@
+"""
+Per-check cost of the listing read path: ORM entities + validated responses against
+selected columns + constructed responses (repository.check.get_checks_by_filter).
+
+    python -m benchmarks.read_path --checks 2000 --products 5 --per-page 100
+
+Each page is read in a new session and serialised with model_dump_json, like the route does.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from decimal import Decimal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from src.conf.config import config
+from src.database.models import Base, Check, User
+from src.filters.check import CheckFilter
+from src.repository.check import count_checks_by_filter, create_checks, get_checks_by_filter
+from src.schemas.check import CheckRequest, CheckResponse, PaymentResponse, ProductResponse
+from src.schemas.user import CurrentUser
+
+
+async def orm_page(db: AsyncSession, user: CurrentUser, page: int, per_page: int) -> list[CheckResponse]:
+    # The read path before: full entities with selectin-loaded products, every response validated
+    query = (select(Check).where(Check.user_id == user.id).options(selectinload(Check.products))
+             .order_by(Check.created_at, Check.id).offset(page * per_page).limit(per_page))
+    checks = (await db.execute(query)).scalars().all()
+    await count_checks_by_filter(CheckFilter(), user, db)
+    return [
+        CheckResponse(
+            id=check.id,
+            products=[ProductResponse(name=product.name, price=product.price, quantity=product.quantity,
+                                      total=product.total) for product in check.products],
+            payment=PaymentResponse(type=check.payment_type, amount=check.payment_amount),
+            total=check.total,
+            rest=check.rest,
+            created_at=check.created_at,
+            business_name=user.business_name,
+            links={"link_html": f"{config.DOMAIN}/{check.id}/html",
+                   "link_txt": f"{config.DOMAIN}/{check.id}/txt",
+                   "link_qr": f"{config.DOMAIN}/{check.id}/qr-code"},
+        )
+        for check in checks
+    ]
+
+
+async def column_page(db: AsyncSession, user: CurrentUser, page: int, per_page: int) -> list[CheckResponse]:
+    result = await get_checks_by_filter(CheckFilter(), user, page, per_page, db)
+    return result["entries"]
+
+
+async def seed(sessions: async_sessionmaker, checks: int, products: int) -> CurrentUser:
+    async with sessions() as db:
+        user = User(username="bench", email="bench@example.com", password="-", business_name="FOP Bench")
+        db.add(user)
+        await db.commit()
+        current_user = CurrentUser.model_validate(user)
+        body = CheckRequest(
+            products=[{"name": f"Product {number}", "price": Decimal("12.50"), "quantity": number + 1}
+                      for number in range(products)],
+            payment={"type": "cash", "amount": Decimal("1000")},
+        )
+        total = sum(item.price * item.quantity for item in body.products)
+        for start in range(0, checks, 500):
+            batch = [(body, total, body.payment.amount - total)] * min(500, checks - start)
+            await create_checks(batch, current_user.id, db)
+    return current_user
+
+
+async def measure(sessions: async_sessionmaker, read_page, user: CurrentUser, checks: int, per_page: int,
+                  repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for page in range(checks // per_page):
+            async with sessions() as db:
+                entries = await read_page(db, user, page, per_page)
+            for entry in entries:
+                entry.model_dump_json()
+        best = min(best, time.perf_counter() - started)
+    return best / checks
+
+
+async def run(checks: int, products: int, per_page: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        user = await seed(sessions, checks, products)
+
+        async with sessions() as db:
+            orm = [entry.model_dump_json() for entry in await orm_page(db, user, 0, per_page)]
+        async with sessions() as db:
+            columns = [entry.model_dump_json() for entry in await column_page(db, user, 0, per_page)]
+        assert orm == columns, "The read paths return different responses"
+
+        before = await measure(sessions, orm_page, user, checks, per_page, repeat)
+        after = await measure(sessions, column_page, user, checks, per_page, repeat)
+        await engine.dispose()
+
+    print(f"checks: {checks} x {products} products, {per_page} per page")
+    print(f"ORM entities + validation:  {before * 1e6:8.1f} us per check")
+    print(f"columns + model_construct:  {after * 1e6:8.1f} us per check")
+    print(f"speedup:                    {before / after:8.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=5)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.checks, args.products, args.per_page, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Microbenchmarks of the hot paths, run apart from the test suite:
+
+    pytest benchmarks                                  # all benchmarks, summary table
+    pytest benchmarks --benchmark-autosave             # keep the results in .benchmarks
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+
+The last form compares with the latest saved run and fails on a 10% regression of the mean.
+"""
+import asyncio
+from collections import namedtuple
+from decimal import Decimal
+
+import pytest
+from jose import jwt
+
+from benchmarks.json_render import default_body, fast_body, make_page
+from benchmarks.text_render import make_checks
+from src.repository.check import check_response_from_rows
+from src.services.auth import auth_service
+from src.services.check import CheckBatchView, CheckView
+from src.services.qr import QRFormatEnum, render_qr
+
+CheckRow = namedtuple("CheckRow", "id created_at payment_type payment_amount total rest")
+ProductRow = namedtuple("ProductRow", "name price quantity product_total")
+
+CLAIMS = {"sub": "bench@example.com", "uid": 1, "username": "bench", "business_name": "FOP Bench"}
+
+
+@pytest.fixture(scope="module")
+def check():
+    return make_checks(1, products=8)[0]
+
+
+@pytest.fixture(scope="module")
+def checks():
+    return make_checks(100, products=8)
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_check_view_generate(benchmark, check):
+    view = CheckView(business_name=check.business_name, items=check.products, total=check.total,
+                     payment_method=check.payment.type, change=check.rest, created_at=check.created_at)
+    benchmark(view.generate)
+
+
+def test_check_batch_view_100(benchmark, checks):
+    view = CheckBatchView()
+    benchmark(view.generate, checks)
+
+
+def test_check_response_from_rows(benchmark, check):
+    check_row = CheckRow(check.id, check.created_at, check.payment.type, check.payment.amount, check.total, check.rest)
+    product_rows = [ProductRow(product.name, product.price, Decimal(product.quantity), product.total)
+                    for product in check.products]
+    benchmark(check_response_from_rows, check_row, product_rows, check.business_name)
+
+
+def test_check_response_json(benchmark, check):
+    benchmark(check.model_dump_json)
+
+
+def test_check_list_response_model(benchmark, loop):
+    page = make_page(100, products=20)
+    benchmark(default_body, page, loop)
+
+
+def test_check_list_fast_json(benchmark, loop):
+    page = make_page(100, products=20)
+    assert fast_body(page) == default_body(page, loop)
+    benchmark(fast_body, page)
+
+
+def test_jwt_create_access_token(benchmark, loop):
+    benchmark(lambda: loop.run_until_complete(auth_service.create_access_token(CLAIMS)))
+
+
+def test_jwt_decode(benchmark, loop):
+    token = loop.run_until_complete(auth_service.create_access_token(CLAIMS))
+    benchmark(jwt.decode, token, auth_service.SECRET_KEY, algorithms=[auth_service.ALGORITHM])
+
+
+@pytest.mark.parametrize("image_format", list(QRFormatEnum))
+def test_render_qr(benchmark, image_format):
+    benchmark(render_qr, "http://localhost:8000/123456/html", image_format, 10)
@@ -0,0 +1,79 @@
+"""
+Bulk text printing: CheckView per receipt against CheckBatchView over the whole run.
+
+    python -m benchmarks.text_render --checks 10000 --products 8 --line-width 32
+
+Both renderers get the same CheckResponse objects and must produce the same text.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from src.schemas.check import CheckResponse
+from src.services.check import CheckBatchView, CheckView
+
+
+def make_checks(count: int, products: int, seed: int = 42) -> list[CheckResponse]:
+    rnd = random.Random(seed)
+    started = datetime(2024, 1, 1, 9, 0)
+    checks = []
+    for check_id in range(1, count + 1):
+        items = []
+        for number in range(rnd.randint(1, products)):
+            price = Decimal(rnd.randint(100, 500000)) / 100
+            quantity = Decimal(rnd.randint(1, 5))
+            items.append({"name": f"Product {number} of check {check_id}", "price": price,
+                          "quantity": quantity, "total": price * quantity})
+        total = sum(item["total"] for item in items)
+        amount = total + rnd.randint(0, 500)
+        checks.append(CheckResponse(id=check_id, products=items, payment={"type": rnd.choice(["cash", "cashless"]),
+                                                                          "amount": amount},
+                                    total=total, rest=amount - total, business_name="FOP Benchmark",
+                                    created_at=started + timedelta(minutes=check_id),
+                                    links={"link_html": "", "link_txt": "", "link_qr": ""}))
+    return checks
+
+
+def check_view_run(checks: list[CheckResponse], line_width: int) -> str:
+    return "".join(CheckView(business_name=check.business_name, items=check.products, total=check.total,
+                             payment_method=check.payment.type, change=check.rest, line_width=line_width,
+                             created_at=check.created_at).generate() + "\f\n"
+                   for check in checks)
+
+
+def batch_view_run(checks: list[CheckResponse], line_width: int) -> str:
+    return CheckBatchView(line_width=line_width).generate(checks)
+
+
+def best_of(func, repeat: int, *args) -> tuple[float, str]:
+    timings, result = [], ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=10000)
+    parser.add_argument("--products", type=int, default=8, help="Maximum products per check")
+    parser.add_argument("--line-width", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    checks = make_checks(args.checks, args.products)
+    single, expected = best_of(check_view_run, args.repeat, checks, args.line_width)
+    batch, result = best_of(batch_view_run, args.repeat, checks, args.line_width)
+    assert result == expected, "CheckBatchView output differs from CheckView"
+
+    print(f"checks:         {args.checks}")
+    print(f"CheckView:      {single * 1000:.1f} ms ({args.checks / single:,.0f} receipts/s)")
+    print(f"CheckBatchView: {batch * 1000:.1f} ms ({args.checks / batch:,.0f} receipts/s)")
+    print(f"speedup:        {single / batch:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
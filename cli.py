@@ -0,0 +1,62 @@
+"""
+Maintenance commands.
+
+    python cli.py rebuild-rollups              # recompute check_daily_stats for all users
+    python cli.py rebuild-rollups --user-id 7
+    python cli.py seed --users 100 --checks 1000000 --seed 1   # generated data for scale tests
+"""
+import argparse
+import asyncio
+from datetime import date
+
+from src.database.db import sessionmanager
+from src.repository.seed import DEFAULT_END, seed_database
+from src.repository.stats import rebuild_daily_stats
+from src.services.auth import auth_service
+
+SEED_PASSWORD = "12345678"
+
+
+async def rebuild_rollups(args: argparse.Namespace) -> None:
+    async with sessionmanager.session() as db:
+        rows = await rebuild_daily_stats(db, user_id=args.user_id)
+    await sessionmanager.close()
+    print(f"check_daily_stats: {rows} rows written")
+
+
+async def seed(args: argparse.Namespace) -> None:
+    password_hash = await auth_service.get_password_hash(SEED_PASSWORD)
+    async with sessionmanager.session() as db:
+        result = await seed_database(db, password_hash, users=args.users, checks=args.checks, seed=args.seed,
+                                     max_products=args.max_products, days=args.days, end=args.end,
+                                     batch_size=args.batch_size)
+    await sessionmanager.close()
+    print(f"created {result.users} users, {result.checks} checks, {result.products} products; "
+          f"password of every user: {SEED_PASSWORD}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-rollups", help="Recompute the daily stats from the checks table")
+    rebuild.add_argument("--user-id", type=int, default=None, help="Rebuild one user only")
+    rebuild.set_defaults(handler=rebuild_rollups)
+
+    generate = commands.add_parser("seed", help="Fill the database with generated users, checks and products")
+    generate.add_argument("--users", type=int, default=10)
+    generate.add_argument("--checks", type=int, default=10000, help="Checks shared among the new users")
+    generate.add_argument("--seed", type=int, default=0, help="The same seed generates the same data")
+    generate.add_argument("--max-products", type=int, default=20, help="Most product lines on one check")
+    generate.add_argument("--days", type=int, default=365, help="Checks are spread over this many days")
+    generate.add_argument("--end", type=date.fromisoformat, default=DEFAULT_END,
+                          help=f"Day after the last check, YYYY-MM-DD, {DEFAULT_END} by default")
+    generate.add_argument("--batch-size", type=int, default=10000, help="Checks written per transaction")
+    generate.set_defaults(handler=seed)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI, Depends, HTTPException
 
@@ -7,11 +9,31 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
-from src.routes import auth, check, check_view
+from src.database.db import get_db, sessionmanager
+from src.routes import auth, check, check_view, metrics, products
+from src.services.auth import auth_service
+from src.services.profiling import ProfilingMiddleware
+from src.services.render import render_executor
+from src.services.slow_query import stop_slow_query_log
 from src.conf.config import config
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Release the database connections and the worker pools and close the slow query log
+    when the application shuts down.
+
+    :param app: FastAPI: The application
+    """
+    yield
+    await sessionmanager.close()
+    render_executor.shutdown()
+    auth_service.hash_executor.shutdown()
+    stop_slow_query_log()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = ["*"]
 
@@ -22,10 +44,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if config.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 
 app.include_router(auth.router, prefix="/api")
 app.include_router(check.router, prefix="/api")
+app.include_router(products.router, prefix="/api")
 app.include_router(check_view.router)
+if config.METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 templates = Jinja2Templates(directory="src/templates")
 app.mount("/static", StaticFiles(directory="src/static"), name="static")
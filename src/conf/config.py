@@ -6,12 +6,78 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DB_URL: str = "postgresql+asyncpg://DB_USERNAME:DB_PASSWORD@BD_HOST:5432/DB_NAME"
+    # Connections kept open, extra connections allowed under load and seconds to wait for a free one
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    # Seconds after which a connection is replaced, -1 keeps connections for good
+    DB_POOL_RECYCLE: int = 1800
+    # Test connections with a round-trip when they are taken from the pool
+    DB_POOL_PRE_PING: bool = True
+    # Prepared statements cached per asyncpg connection, 0 disables the cache (e.g. behind pgbouncer)
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Read replicas for listing, view and report queries, as a JSON list of URLs; empty reads from DB_URL
+    DB_REPLICA_URLS: list[str] = []
+    # How a replica is chosen for a read session: round_robin or least_connections
+    DB_REPLICA_STRATEGY: str = "round_robin"
+    # Seconds a replica that failed to connect is skipped, its reads go to the primary meanwhile
+    DB_REPLICA_RETRY_AFTER: float = 30
     SECRET_KEY_JWT: str = "1234567890"
     ALGORITHM: str = "HS256"
     HOST: str = 'localhost'
     PORT: int = 8000
     PROTOCOL: str = 'http'
     DOMAIN: str = f"{PROTOCOL}://{HOST}:{PORT}"
+    CHECK_BATCH_MAX_SIZE: int = 5000
+    # Checks written per transaction by POST /api/check/batch, 0 writes the whole batch in one transaction
+    CHECK_BATCH_CHUNK_SIZE: int = 0
+    # Rows fetched per round-trip by the streaming export
+    CHECK_EXPORT_BATCH_SIZE: int = 1000
+    # Answer day stats over whole days from the check_daily_stats rollup instead of scanning checks
+    STATS_USE_ROLLUP: bool = True
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: float = 300
+    # Verified access tokens kept until they expire, so repeated requests skip jwt.decode
+    TOKEN_CACHE_SIZE: int = 50000
+    # Put the user id, username and business name into access tokens, so no user lookup is needed.
+    # The claims skip the user cache and its invalidation: a deleted user keeps access and a renamed
+    # business name stays on new receipts until the token expires (15 minutes by default)
+    JWT_USER_CLAIMS: bool = False
+    # Rendered receipt views (html, txt, qr) kept in memory, and optionally on disk
+    VIEW_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    VIEW_CACHE_DIR: str | None = None
+    VIEW_CACHE_MAX_AGE: int = 3600
+    # Pool rendering the receipt views: thread or process, 0 workers renders on the event loop
+    RENDER_EXECUTOR: str = "thread"
+    RENDER_WORKERS: int = 2
+    QR_BOX_SIZE: int = 10
+    # Fixed QR mask pattern (0-7) to skip the best mask search, None searches like the reference encoder
+    QR_MASK_PATTERN: int | None = None
+    # Render QR codes of new checks in a background task right after they are created
+    QR_EAGER: bool = False
+    # Threads hashing and verifying passwords, 0 runs bcrypt on the event loop
+    PASSWORD_HASH_WORKERS: int = 4
+    # Time requests, their SQL statements and renders (Server-Timing header and /metrics)
+    PROFILING_ENABLED: bool = False
+    # Requests with this header set to PROFILING_SECRET, and this share of all requests, are also profiled
+    # with cProfile into PROFILING_DIR; an empty secret turns the header off
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_SECRET: str = ""
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_DIR: str = "profiles"
+    # Profiles kept in PROFILING_DIR, the oldest are deleted
+    PROFILING_MAX_FILES: int = 20
+    # Serve /metrics (request timings, caches, worker and connection pools); it has no authentication
+    METRICS_ENABLED: bool = False
+    # Log statements slower than this many milliseconds to SLOW_QUERY_LOG_FILE, 0 disables the log
+    SLOW_QUERY_MS: float = 0
+    SLOW_QUERY_LOG_FILE: str = "logs/slow_queries.log"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS: int = 5
+    # On Postgres also log EXPLAIN (ANALYZE, BUFFERS) of slow tagged reads, at most once per tag in this many seconds
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_EXPLAIN_INTERVAL: float = 60
 
     @field_validator("ALGORITHM")
     @classmethod
@@ -20,6 +86,20 @@ class Settings(BaseSettings):
             raise ValueError("algorithm must be HS256 or HS512")
         return v
 
+    @field_validator("DB_REPLICA_STRATEGY")
+    @classmethod
+    def validate_replica_strategy(cls, v: Any):
+        if v not in ["round_robin", "least_connections"]:
+            raise ValueError("replica strategy must be round_robin or least_connections")
+        return v
+
+    @field_validator("RENDER_EXECUTOR")
+    @classmethod
+    def validate_render_executor(cls, v: Any):
+        if v not in ["thread", "process"]:
+            raise ValueError("render executor must be thread or process")
+        return v
+
     model_config = ConfigDict(extra='ignore', env_file=".env", env_file_encoding="utf-8")  # noqa
 
 
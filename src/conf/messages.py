@@ -7,3 +7,6 @@ CREDENTIALS_INVALID = "Could not validate credentials"
 PAYMENT_AMOUNT_INVALID = "Insufficient payment amount"
 SCOPE_INVALID = 'Invalid scope for token!'
 NOT_AUTH = 'Not authenticated'
+CURSOR_INVALID = "Invalid pagination cursor"
+BATCH_TOO_LARGE = "Too many checks in one batch"
+BATCH_WRITE_FAILED = "Check was not saved"
@@ -1,5 +1,11 @@
 import contextlib
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Sequence
 
+from sqlalchemy import make_url
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -9,23 +15,85 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from src.conf.config import config
+from src.services.profiling import instrument_engine
+from src.services.slow_query import instrument_slow_queries, start_slow_query_log
+
+logger = logging.getLogger(__name__)
+
+
+def engine_options(url: str) -> tuple[Any, dict[str, Any]]:
+    """
+    Build the engine URL and keyword arguments from the pool settings.
+    SQLite opens a connection per session (or keeps a single one in memory) and gets no pool settings.
+
+    :param url: str: Database URL
+    :return: The URL and the create_async_engine keyword arguments
+    """
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url, {}
+    if url.drivername == "postgresql+asyncpg":
+        url = url.update_query_dict({"prepared_statement_cache_size": str(config.DB_STATEMENT_CACHE_SIZE)})
+    return url, {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+
+
+@dataclass
+class Replica:
+    engine: AsyncEngine
+    session_maker: async_sessionmaker
+    in_use: int = 0
+    down_until: float = 0.0
 
 
 class DatabaseSessionManager:
-    def __init__(self, url: str):
+    def __init__(self, url: str, replica_urls: Sequence[str] = (), strategy: str = "round_robin"):
         """
         The __init__ function is called when the class is instantiated.
         It sets up the database connection and sessionmaker, which will be used for all queries.
 
         :param self: Represent the instance of the class
         :param url: str: Create the engine
+        :param replica_urls: Sequence[str]: Read replicas used by read_session
+        :param strategy: str: Replica selection, round_robin or least_connections
         :return: A new instance of the class
         :doc-author: Trelent
         """
-        self._engine: AsyncEngine | None = create_async_engine(url)
+        url, options = engine_options(url)
+        self._engine: AsyncEngine | None = create_async_engine(url, **options)
         self._session_maker: async_sessionmaker = async_sessionmaker(
             autoflush=False, autocommit=False, bind=self._engine
         )
+        self._replicas: list[Replica] = []
+        for replica_url in replica_urls:
+            replica_url, options = engine_options(replica_url)
+            engine = create_async_engine(replica_url, **options)
+            self._replicas.append(Replica(engine, async_sessionmaker(autoflush=False, autocommit=False, bind=engine)))
+        self._strategy = strategy
+        self._turns = itertools.count()
+        if config.PROFILING_ENABLED:
+            instrument_engine(self._engine)
+            for replica in self._replicas:
+                instrument_engine(replica.engine)
+        if config.SLOW_QUERY_MS > 0:
+            start_slow_query_log()
+            instrument_slow_queries(self._engine)
+            for replica in self._replicas:
+                instrument_slow_queries(replica.engine)
+
+    def _choose_replica(self) -> Replica | None:
+        now = time.monotonic()
+        available = [replica for replica in self._replicas if replica.down_until <= now]
+        if not available:
+            return None
+        if self._strategy == "least_connections":
+            return min(available, key=lambda replica: replica.in_use)
+        return available[next(self._turns) % len(available)]
 
     @contextlib.asynccontextmanager
     async def session(self):
@@ -49,8 +117,91 @@ class DatabaseSessionManager:
         finally:
             await session.close()
 
+    @contextlib.asynccontextmanager
+    async def read_session(self):
+        """
+        Open a session on a read replica, chosen by the strategy of the manager.
+        A replica that fails to connect is skipped for DB_REPLICA_RETRY_AFTER seconds and the session
+        is opened on the primary instead; without replicas every read session is a primary session.
+        Only use it for reads: replicas may lag behind the primary, see is_replica_session.
 
-sessionmanager = DatabaseSessionManager(config.DB_URL)
+        :return: A context manager yielding the session
+        """
+        replica = self._choose_replica()
+        if replica is None:
+            async with self.session() as session:
+                yield session
+            return
+        replica.in_use += 1
+        session = replica.session_maker()
+        try:
+            try:
+                await session.connection()
+            except (OSError, SQLAlchemyError) as err:
+                logger.warning("Replica %s is unavailable, reading from the primary: %s",
+                               replica.engine.url.render_as_string(hide_password=True), err)
+                replica.down_until = time.monotonic() + config.DB_REPLICA_RETRY_AFTER
+                await session.close()
+                session = self._session_maker()
+            else:
+                session.info["replica"] = True
+            yield session
+        finally:
+            replica.in_use -= 1
+            await session.close()
+
+    async def close(self) -> None:
+        """
+        Close all pooled connections, e.g. when the application shuts down.
+        The manager can not open sessions afterwards.
+        """
+        if self._engine is None:
+            return
+        await self._engine.dispose()
+        for replica in self._replicas:
+            await replica.engine.dispose()
+        self._engine = None
+        self._session_maker = None
+        self._replicas = []
+
+    def pool_stats(self) -> dict[str, Any]:
+        """
+        Report the state of the connection pool.
+
+        :return: The pool class, its size and the connections checked in, checked out and in overflow
+        """
+        if self._engine is None:
+            return {"pool": None}
+        pool = self._engine.pool
+        stats = {"pool": type(pool).__name__}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, name):
+                stats[name] = getattr(pool, name)()
+        if hasattr(pool, "timeout"):
+            stats["timeout"] = pool.timeout()
+        if self._replicas:
+            now = time.monotonic()
+            stats["replicas"] = [
+                {"url": replica.engine.url.render_as_string(hide_password=True),
+                 "pool": type(replica.engine.pool).__name__,
+                 "in_use": replica.in_use,
+                 "available": replica.down_until <= now}
+                for replica in self._replicas
+            ]
+        return stats
+
+
+def is_replica_session(session: AsyncSession) -> bool:
+    """
+    Tell whether a session from read_session reads from a replica, which may not have the latest writes yet.
+
+    :param session: AsyncSession: The session
+    :return: bool: True for a replica session
+    """
+    return session.info.get("replica", False)
+
+
+sessionmanager = DatabaseSessionManager(config.DB_URL, config.DB_REPLICA_URLS, config.DB_REPLICA_STRATEGY)
 
 
 async def get_db():
@@ -64,4 +215,25 @@ async def get_db():
     :doc-author: Babenko Vladyslav
     """
     async with sessionmanager.session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+async def get_read_db():
+    """
+    The get_read_db function returns a session for read-only queries, opened on a read replica
+    when replicas are configured (see DatabaseSessionManager.read_session) and on the primary otherwise.
+
+    :return: A context manager that can be used to interact with the database
+    """
+    async with sessionmanager.read_session() as session:
+        yield session
+
+
+def get_read_session_factory():
+    """
+    The get_read_session_factory function returns sessionmanager.read_session, for streaming responses:
+    their body is sent after the dependencies are closed, so the stream opens and closes its own read session.
+
+    :return: A function returning a context manager that yields a read session
+    """
+    return sessionmanager.read_session
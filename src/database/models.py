@@ -1,9 +1,43 @@
 from datetime import  datetime
 
-from sqlalchemy import  String, DateTime, Integer, ForeignKey, Numeric, func
+from sqlalchemy import  String, DateTime, Integer, ForeignKey, Index, Numeric, func
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column, relationship, DeclarativeBase
+from sqlalchemy.sql.functions import FunctionElement, now
+from sqlalchemy.sql.visitors import InternalTraversal
 
 
+@compiles(now, "sqlite")
+def sqlite_now(element, compiler, **kw):
+    # CURRENT_TIMESTAMP has no fractional part, while SQLAlchemy stores and binds SQLite
+    # datetimes as "YYYY-MM-DD HH:MM:SS.ffffff"; keep both in one format so comparisons hold
+    return "STRFTIME('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+class truncate_datetime(FunctionElement):
+    """
+    The datetime truncated to the start of its day or hour, e.g. for GROUP BY in reports.
+    """
+    type = DateTime()
+    inherit_cache = True
+    _traverse_internals = FunctionElement._traverse_internals + [("unit", InternalTraversal.dp_string)]
+
+    def __init__(self, unit: str, column):
+        self.unit = unit
+        super().__init__(column)
+
+
+@compiles(truncate_datetime)
+def default_truncate_datetime(element, compiler, **kw):
+    return f"date_trunc('{element.unit}', {compiler.process(element.clauses, **kw)})"
+
+
+@compiles(truncate_datetime, "sqlite")
+def sqlite_truncate_datetime(element, compiler, **kw):
+    # Same text format as the datetimes SQLAlchemy binds, so the results compare equal to them
+    date_format = {"day": "%Y-%m-%d 00:00:00.000000", "hour": "%Y-%m-%d %H:00:00.000000"}[element.unit]
+    return f"STRFTIME('{date_format}', {compiler.process(element.clauses, **kw)})"
+
 
 class Base(DeclarativeBase):
     pass
@@ -20,11 +54,21 @@ class User(Base):
     refresh_token: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
-    checks: Mapped[list["Check"]] = relationship("Check", back_populates="user")
+    checks: Mapped[list["Check"]] = relationship("Check", back_populates="user", lazy="raise")
 
 
 class Check(Base):
     __tablename__ = "checks"
+    __table_args__ = (
+        # Listing by owner in (created_at, id) order, with or without a date range and cursor;
+        # on Postgres the remaining columns are included so the page is read from the index only
+        Index("ix_checks_user_id_created_at", "user_id", "created_at", "id",
+              postgresql_include=["payment_type", "payment_amount", "total", "rest"]),
+        # Listing filtered by payment type
+        Index("ix_checks_user_id_payment_type_created_at", "user_id", "payment_type", "created_at", "id"),
+        # Listing filtered by payment amount range
+        Index("ix_checks_user_id_payment_amount", "user_id", "payment_amount"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -33,17 +77,34 @@ class Check(Base):
     payment_amount: Mapped[Numeric] = mapped_column(Numeric(10, 2), nullable=False)
     total: Mapped[Numeric] = mapped_column(Numeric(10, 2), nullable=False)
     rest: Mapped[Numeric] = mapped_column(Numeric(10, 2), nullable=False)
-    user: Mapped[User] = relationship("User", back_populates="checks")
-    products: Mapped[list["Product"]] = relationship("Product", back_populates="check", lazy="selectin")
+    # Relationships are never loaded implicitly: queries choose a loader option or select columns,
+    # so the number of statements per request does not depend on the number of rows
+    user: Mapped[User] = relationship("User", back_populates="checks", lazy="raise")
+    products: Mapped[list["Product"]] = relationship("Product", back_populates="check", lazy="raise")
 
 
 class Product(Base):
     __tablename__ = "products"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    check_id: Mapped[int] = mapped_column(ForeignKey("checks.id"), nullable=False)
+    check_id: Mapped[int] = mapped_column(ForeignKey("checks.id"), nullable=False, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     price: Mapped[Numeric] = mapped_column(Numeric(10, 2), nullable=False)
     quantity: Mapped[Numeric] = mapped_column(Numeric(10, 2), nullable=False)
     total: Mapped[Numeric] = mapped_column(Numeric(10, 2), nullable=False)
-    check: Mapped[Check] = relationship("Check", back_populates="products", lazy="selectin")
+    check: Mapped[Check] = relationship("Check", back_populates="products", lazy="raise")
+
+
+class CheckDailyStats(Base):
+    """
+    Per user, day and payment type totals of the checks, kept up to date when checks are created.
+    """
+    __tablename__ = "check_daily_stats"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    day: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    payment_type: Mapped[str] = mapped_column(String(10), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+    sum_total: Mapped[Numeric] = mapped_column(Numeric(14, 2), nullable=False)
+    sum_rest: Mapped[Numeric] = mapped_column(Numeric(14, 2), nullable=False)
+    sum_payment_amount: Mapped[Numeric] = mapped_column(Numeric(14, 2), nullable=False)
@@ -1,158 +1,361 @@
 import math
 from datetime import datetime
-from typing import Dict, List
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List
 
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import Select, and_, func, insert, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from src.database.db import get_db
-from src.database.models import User, Product, Check
+from src.database.db import get_db, is_replica_session
+from src.database.models import Product, Check, User, truncate_datetime
+from src.schemas.user import CurrentUser
 from src.filters.check import CheckFilter
-from src.schemas.check import CheckRequest, CheckResponse, ProductResponse, PaymentResponse
+from src.repository.stats import add_to_daily_stats, covered_by_daily_stats, get_daily_stats
+from src.services.pagination import encode_cursor
+from src.services.slow_query import TAG_OPTION
+from src.schemas.check import (CheckRequest, CheckResponse, ProductResponse, PaymentResponse, ViewResponse,
+                               CheckStatsEntry, StatsGranularityEnum)
 from src.conf.config import config
 
 
-async def create_products(products: list, check_id: int, db: AsyncSession) -> None:
-    for item in products:
-        product_total = item.price * item.quantity
-        new_product = Product(
-            check_id=check_id,
-            name=item.name,
-            price=item.price,
-            quantity=item.quantity,
-            total=product_total
-        )
-        db.add(new_product)
-    await db.commit()
+def _product_rows(products: list, check_id: int) -> list[dict]:
+    return [
+        {
+            "check_id": check_id,
+            "name": item.name,
+            "price": item.price,
+            "quantity": item.quantity,
+            "total": item.price * item.quantity,
+        }
+        for item in products
+    ]
+
+
+async def _insert_product_rows(rows: list[dict], db: AsyncSession) -> list[int]:
+    if not rows:
+        return []
+    result = await db.scalars(insert(Product).returning(Product.id), rows)
+    return list(result)
+
+
+async def create_products(products: list, check_id: int, db: AsyncSession) -> list[int]:
+    """
+    Insert all product lines of a check with one multi-row INSERT ... RETURNING statement.
+    The caller is responsible for the commit.
+
+    :param products: list: Product lines from the request
+    :param check_id: int: The check the lines belong to
+    :param db: AsyncSession: The database session
+    :return: IDs of the inserted products
+    """
+    return await _insert_product_rows(_product_rows(products, check_id), db)
 
 
-async def create_check(body: CheckRequest, current_user: User, total: float, rest: float,
+async def create_check(body: CheckRequest, current_user: CurrentUser, total: float, rest: float,
                        db: AsyncSession = Depends(get_db)) -> (int, datetime):
     """
-    The CheckRequest function creates a new check in the database.
+    The CheckRequest function creates a new check with its products in the database.
+    The check row and all product lines are written with INSERT ... RETURNING,
+    the daily stats are updated and everything is committed at once.
 
     :param rest: Rest amount for user
     :param total: Total payment amount
     :param current_user: Current user from the database
     :param body: CheckRequest: Validate the request body
     :param db: AsyncSession: Get the database session from the dependency
-    :return: The newly created check object
+    :return: The ID, creation time and business name of the new check
     :doc-author: Babenko Vladyslav
     """
     business_name = current_user.business_name
-    new_check = Check(
+    insert_check = insert(Check).values(
         user_id=current_user.id,
         payment_type=body.payment.type,
         payment_amount=body.payment.amount,
         total=total,
         rest=rest
+    ).returning(Check.id, Check.created_at)
+    result = await db.execute(insert_check)
+    check_id, created_at = result.one()
+    await create_products(body.products, check_id, db)
+    await add_to_daily_stats([(created_at, body.payment.type, body.payment.amount, total, rest)],
+                             current_user.id, db)
+    await db.commit()
+    return check_id, created_at, business_name
+
+
+async def create_checks(checks: list[tuple[CheckRequest, Decimal, Decimal]], user_id: int,
+                        db: AsyncSession = Depends(get_db)) -> list[tuple[int, datetime]]:
+    """
+    Create many checks with their products in one transaction.
+    All checks are written with one multi-row INSERT ... RETURNING, then all product lines with another one.
+
+    :param checks: list: The (body, total, rest) of every check, already validated
+    :param user_id: int: Owner of the checks
+    :param db: AsyncSession: The database session
+    :return: The ID and creation time of every check, in the order of the input
+    """
+    if not checks:
+        return []
+    check_rows = [
+        {
+            "user_id": user_id,
+            "payment_type": body.payment.type,
+            "payment_amount": body.payment.amount,
+            "total": total,
+            "rest": rest,
+        }
+        for body, total, rest in checks
+    ]
+    result = await db.execute(
+        insert(Check).returning(Check.id, Check.created_at, sort_by_parameter_order=True), check_rows
+    )
+    created = [(check_id, created_at) for check_id, created_at in result]
+    product_rows = []
+    for (check_id, _), (body, _, _) in zip(created, checks):
+        product_rows.extend(_product_rows(body.products, check_id))
+    await _insert_product_rows(product_rows, db)
+    await add_to_daily_stats(
+        [(created_at, body.payment.type, body.payment.amount, total, rest)
+         for (_, created_at), (body, total, rest) in zip(created, checks)],
+        user_id, db
     )
-    db.add(new_check)
     await db.commit()
-    await db.refresh(new_check)
-    return new_check.id, new_check.created_at, business_name
+    return created
+
+
+CHECK_COLUMNS = (Check.id, Check.created_at, Check.payment_type, Check.payment_amount, Check.total, Check.rest)
+PRODUCT_COLUMNS = (Product.name, Product.price, Product.quantity, Product.total.label("product_total"))
+
+
+def check_response_from_rows(check_row, product_rows, business_name: str) -> CheckResponse:
+    """
+    Build the response from selected columns (CHECK_COLUMNS and PRODUCT_COLUMNS) without validation:
+    the values come from the database and already have the response types.
+
+    :param check_row: Row with the check columns
+    :param product_rows: Rows with the product columns, in line order
+    :param business_name: str: Business name of the check owner
+    :return: CheckResponse
+    """
+    check_id = check_row.id
+    return CheckResponse.model_construct(
+        id=check_id,
+        products=[
+            ProductResponse.model_construct(name=row.name, price=row.price, quantity=int(row.quantity),
+                                            total=row.product_total)
+            for row in product_rows
+        ],
+        payment=PaymentResponse.model_construct(type=check_row.payment_type, amount=check_row.payment_amount),
+        total=check_row.total,
+        rest=check_row.rest,
+        created_at=check_row.created_at,
+        business_name=business_name,
+        links=ViewResponse.model_construct(
+            link_html=f"{config.DOMAIN}/{check_id}/html",
+            link_txt=f"{config.DOMAIN}/{check_id}/txt",
+            link_qr=f"{config.DOMAIN}/{check_id}/qr-code",
+        )
+    )
 
 
-async def get_check_by_id(check_id: int, user: User = None, db: AsyncSession = Depends(get_db)) -> CheckResponse | None:
+async def get_check_by_id(check_id: int, user: CurrentUser = None, db: AsyncSession = Depends(get_db)) -> CheckResponse | None:
     """
     Get a check by ID.
+    The check, its owner's business name and its products are read with one query, no ORM objects are built.
 
     :param user:  Current user from the database
     :param check_id: int: The unique check ID
     :param db: AsyncSession: The database session
     :return: CheckResponse: The CheckResponse object or None
     """
-    select_check = select(Check).options(selectinload(Check.user), selectinload(Check.products))
+    query = (
+        select(*CHECK_COLUMNS, User.business_name, *PRODUCT_COLUMNS)
+        .join(User, User.id == Check.user_id)
+        .outerjoin(Product, Product.check_id == Check.id)
+        .where(Check.id == check_id)
+        .order_by(Product.id)
+        .execution_options(**{TAG_OPTION: "check_by_id"})
+    )
     if user:
-        filter_check = select_check.filter_by(id=check_id, user_id=user.id)
-    else:
-        filter_check = select_check.filter_by(id=check_id)
-    check_expression = await db.execute(filter_check)
-    check = check_expression.scalar_one_or_none()
-    if check is None:
+        query = query.where(Check.user_id == user.id)
+    rows = (await db.execute(query)).all()
+    if not rows:
         return
-    return CheckResponse(
-        id=check.id,
-        products=[
-            {
-                "id": product.id,
-                "name": product.name,
-                "price": product.price,
-                "quantity": product.quantity,
-                "total": product.total,
-            }
-            for product in check.products
-        ],
-        payment={"type": check.payment_type,
-                 "amount": check.payment_amount},
-        total=check.total,
-        rest=check.rest,
-        created_at=check.created_at,
-        business_name=check.user.business_name,
-        links={
-            "link_html": f"{config.DOMAIN}/{check.id}/html",
-            "link_txt": f"{config.DOMAIN}/{check.id}/txt",
-            "link_qr": f"{config.DOMAIN}/{check.id}/qr-code",
-        }
-    )
+    return check_response_from_rows(rows[0], [row for row in rows if row.name is not None], rows[0].business_name)
 
 
-async def get_checks_by_filter(check_filter: CheckFilter,
-                               user: User, page: int, per_page: int,
-                               db: AsyncSession = Depends(get_db)) -> dict[str, int | list[CheckResponse]]:
+async def get_check_by_id_read_your_writes(check_id: int, user: CurrentUser | None, db: AsyncSession,
+                                           primary_db: AsyncSession) -> CheckResponse | None:
     """
-    Get checks by filters
-    :param page: Current page
-    :param per_page: Items per page
+    Get a check by ID from a read session, and from the primary when a replica does not have it.
+    create_check returns the links of a new check right away, they may be followed before the replica catches up.
+
+    :param check_id: int: The unique check ID
+    :param user: Current user from the database
+    :param db: AsyncSession: The read session, e.g. from get_read_db
+    :param primary_db: AsyncSession: The primary session, e.g. from get_db
+    :return: CheckResponse: The CheckResponse object or None
+    """
+    check = await get_check_by_id(check_id, user, db)
+    if check is None and is_replica_session(db):
+        check = await get_check_by_id(check_id, user, primary_db)
+    return check
+
+
+def select_checks_by_filter(check_filter: CheckFilter, user_id: int) -> Select:
+    """
+    Build the listing query for the user's checks with the filters applied.
+    The query selects checks only (no product join), so it can be paged and counted by the database.
+
+    :param check_filter: Filter class
+    :param user_id: int: Owner of the checks
+    :return: Select: The filtered query ordered by creation time
+    """
+    query = select(*CHECK_COLUMNS).where(Check.user_id == user_id)
+    query = check_filter.filter(query)
+    return query.order_by(Check.created_at, Check.id)
+
+
+async def count_checks_by_filter(check_filter: CheckFilter, user: CurrentUser,
+                                 db: AsyncSession = Depends(get_db)) -> int:
+    """
+    Count checks matching the filters with a single COUNT(*) query.
+
     :param check_filter: Filter class
     :param user: Current user from the database
     :param db: AsyncSession: The database session
-    :return: The list with CheckResponse objects or empty list
+    :return: int: Number of matching checks
     """
-    query = select(Check).join(Product).join(User).where(User.id == user.id)
-    query = check_filter.filter(query)
+    query = check_filter.filter(select(func.count(Check.id)).where(Check.user_id == user.id))
+    query = query.execution_options(**{TAG_OPTION: "checks_by_filter_count"})
     result = await db.execute(query)
-    checks = result.scalars().unique().all()
-    check_responses = []
-    offset_min = page * per_page
-    offset_max = (page + 1) * per_page
-    for check in checks[offset_min:offset_max]:
-        product_responses = [
-            ProductResponse(
-                name=product.name,
-                price=product.price,
-                quantity=product.quantity,
-                total=product.total
-            )
-            for product in check.products
-        ]
+    return result.scalar_one()
 
-        payment_response = PaymentResponse(
-            type=check.payment_type,
-            amount=check.payment_amount
-        )
-        links = {
-            "link_html": f"{config.DOMAIN}/{check.id}/html",
-            "link_txt": f"{config.DOMAIN}/{check.id}/txt",
-            "link_qr": f"{config.DOMAIN}/{check.id}/qr-code",
-        }
 
-        check_response = CheckResponse(
-            id=check.id,
-            products=product_responses,
-            payment=payment_response,
-            total=check.total,
-            rest=check.rest,
-            created_at=check.created_at,
-            business_name=check.user.business_name,
-            links=links
-        )
+async def get_checks_by_filter(check_filter: CheckFilter,
+                               user: CurrentUser, page: int, per_page: int,
+                               db: AsyncSession = Depends(get_db),
+                               cursor: tuple[datetime, int] | None = None) -> dict:
+    """
+    Get checks by filters.
+    Paging is done by the database with LIMIT/OFFSET, products are loaded only for the checks of the page.
+    Only the needed columns are selected and the responses are built from the rows, without ORM objects.
+    When a cursor is given the page starts right after the (created_at, id) it points to (keyset paging),
+    the offset is not used and the total is not counted.
 
-        check_responses.append(check_response)
+    :param page: Current page
+    :param per_page: Items per page
+    :param check_filter: Filter class
+    :param user: Current user from the database
+    :param db: AsyncSession: The database session
+    :param cursor: The (created_at, id) of the last check of the previous page
+    :return: The list with CheckResponse objects or empty list
+    """
+    query = (select_checks_by_filter(check_filter, user.id).limit(per_page + 1)
+             .execution_options(**{TAG_OPTION: "checks_by_filter"}))
+    if cursor is None:
+        query = query.offset(page * per_page)
+    else:
+        cursor_created_at, cursor_id = cursor
+        query = query.where(or_(Check.created_at > cursor_created_at,
+                                and_(Check.created_at == cursor_created_at, Check.id > cursor_id)))
+    checks = (await db.execute(query)).all()
+    next_cursor = None
+    if len(checks) > per_page:
+        checks = checks[:per_page]
+        next_cursor = encode_cursor(checks[-1].created_at, checks[-1].id)
+    products: Dict[int, list] = {check.id: [] for check in checks}
+    if products:
+        product_query = (select(Product.check_id, *PRODUCT_COLUMNS)
+                         .where(Product.check_id.in_(list(products)))
+                         .order_by(Product.check_id, Product.id)
+                         .execution_options(**{TAG_OPTION: "checks_by_filter_products"}))
+        for row in await db.execute(product_query):
+            products[row.check_id].append(row)
+    check_responses = [check_response_from_rows(check, products[check.id], user.business_name) for check in checks]
     return {"entries": check_responses,
             "page": page,
             "per_page": per_page,
-            "total": len(checks)
+            "total": await count_checks_by_filter(check_filter, user, db) if cursor is None else None,
+            "next_cursor": next_cursor
             }
+
+
+async def stream_checks_by_filter(check_filter: CheckFilter, user: CurrentUser,
+                                  db: AsyncSession = Depends(get_db)) -> AsyncIterator[CheckResponse]:
+    """
+    Stream all checks matching the filters with their products, in (created_at, id) order.
+    Rows are read through a server-side cursor in batches of CHECK_EXPORT_BATCH_SIZE,
+    so memory does not grow with the number of checks.
+
+    :param check_filter: Filter class
+    :param user: Current user from the database
+    :param db: AsyncSession: The database session
+    :return: An async iterator of CheckResponse objects
+    """
+    user_id, business_name = user.id, user.business_name
+    query = check_filter.filter(
+        select(*CHECK_COLUMNS, *PRODUCT_COLUMNS)
+        .outerjoin(Product, Product.check_id == Check.id)
+        .where(Check.user_id == user_id)
+    ).order_by(Check.created_at, Check.id, Product.id).execution_options(yield_per=config.CHECK_EXPORT_BATCH_SIZE)
+
+    result = await db.stream(query)
+    current, product_rows = None, []
+    async for row in result:
+        if current is not None and row.id != current.id:
+            yield check_response_from_rows(current, product_rows, business_name)
+            product_rows = []
+        current = row
+        if row.name is not None:
+            product_rows.append(row)
+    if current is not None:
+        yield check_response_from_rows(current, product_rows, business_name)
+
+
+async def get_check_stats(check_filter: CheckFilter, user: CurrentUser, granularity: StatsGranularityEnum,
+                          db: AsyncSession = Depends(get_db)) -> list[CheckStatsEntry]:
+    """
+    Aggregate the checks matching the filters per day or hour and payment type with one GROUP BY query.
+    Day stats over whole days are read from the daily rollup instead, see covered_by_daily_stats.
+
+    :param check_filter: Filter class
+    :param user: Current user from the database
+    :param granularity: StatsGranularityEnum: Length of the period, day or hour
+    :param db: AsyncSession: The database session
+    :return: One entry per period and payment type, in period order
+    """
+    if config.STATS_USE_ROLLUP and covered_by_daily_stats(check_filter, granularity):
+        return [
+            CheckStatsEntry(
+                period=row.day,
+                payment_type=row.payment_type,
+                count=row.count,
+                total=row.sum_total,
+                rest=row.sum_rest,
+                payment_amount=row.sum_payment_amount,
+                average=(Decimal(row.sum_total) / row.count).quantize(Decimal("0.01")),
+            )
+            for row in await get_daily_stats(check_filter, user.id, db)
+        ]
+    period = truncate_datetime(granularity.value, Check.created_at).label("period")
+    query = check_filter.filter(
+        select(period, Check.payment_type, func.count(Check.id).label("count"),
+               func.sum(Check.total).label("total"), func.sum(Check.rest).label("rest"),
+               func.sum(Check.payment_amount).label("payment_amount"))
+        .where(Check.user_id == user.id)
+    ).group_by(period, Check.payment_type).order_by(period, Check.payment_type)
+    result = await db.execute(query)
+    return [
+        CheckStatsEntry(
+            period=row.period,
+            payment_type=row.payment_type,
+            count=row.count,
+            total=row.total,
+            rest=row.rest,
+            payment_amount=row.payment_amount,
+            average=(Decimal(row.total) / row.count).quantize(Decimal("0.01")),
+        )
+        for row in result
+    ]
@@ -0,0 +1,68 @@
+from typing import AsyncIterator
+
+from fastapi import Depends
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import config
+from src.database.db import get_db
+from src.database.models import Check, Product
+from src.filters.check import CheckFilter
+from src.schemas.product import ProductMetricEnum, ProductSalesResponse
+from src.schemas.user import CurrentUser
+
+
+def select_product_sales(check_filter: CheckFilter, user_id: int, metric: ProductMetricEnum) -> Select:
+    """
+    Build the per-product sales query over the user's checks matching the filters.
+    Checks are found on the (user_id, created_at) index and their lines on the products (check_id) index,
+    the aggregation is done by the database.
+
+    :param check_filter: Filter class
+    :param user_id: int: Owner of the checks
+    :param metric: ProductMetricEnum: Sort by revenue or quantity, largest first
+    :return: Select: One row per product name
+    """
+    revenue = func.sum(Product.total).label("revenue")
+    quantity = func.sum(Product.quantity).label("quantity")
+    query = check_filter.filter(
+        select(Product.name, quantity, revenue, func.count(func.distinct(Product.check_id)).label("checks"))
+        .join(Check, Check.id == Product.check_id)
+        .where(Check.user_id == user_id)
+    )
+    order = revenue if metric == ProductMetricEnum.revenue else quantity
+    return query.group_by(Product.name).order_by(order.desc(), Product.name)
+
+
+async def get_top_products(check_filter: CheckFilter, user: CurrentUser, metric: ProductMetricEnum, limit: int,
+                           db: AsyncSession = Depends(get_db)) -> list[ProductSalesResponse]:
+    """
+    Get the best selling products of the user by revenue or quantity.
+
+    :param check_filter: Filter class
+    :param user: Current user from the database
+    :param metric: ProductMetricEnum: revenue or quantity
+    :param limit: int: Number of products
+    :param db: AsyncSession: The database session
+    :return: The top products, best first
+    """
+    result = await db.execute(select_product_sales(check_filter, user.id, metric).limit(limit))
+    return [ProductSalesResponse.model_validate(row, from_attributes=True) for row in result]
+
+
+async def stream_product_sales(check_filter: CheckFilter, user: CurrentUser, metric: ProductMetricEnum,
+                               db: AsyncSession = Depends(get_db)) -> AsyncIterator[ProductSalesResponse]:
+    """
+    Stream the sales of every product of the user, best first,
+    reading rows in batches of CHECK_EXPORT_BATCH_SIZE.
+
+    :param check_filter: Filter class
+    :param user: Current user from the database
+    :param metric: ProductMetricEnum: revenue or quantity
+    :param db: AsyncSession: The database session
+    :return: An async iterator of ProductSalesResponse objects
+    """
+    query = select_product_sales(check_filter, user.id, metric)
+    result = await db.stream(query.execution_options(yield_per=config.CHECK_EXPORT_BATCH_SIZE))
+    async for row in result:
+        yield ProductSalesResponse.model_validate(row, from_attributes=True)
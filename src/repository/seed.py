@@ -0,0 +1,158 @@
+import math
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterator
+
+from sqlalchemy import Table, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Check, Product, User
+from src.repository.stats import rebuild_daily_stats
+
+CENT = Decimal("0.01")
+# Number of product lines on a receipt, most receipts are short
+LINES_PER_CHECK = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+LINES_WEIGHTS = (30, 22, 15, 10, 7, 5, 4, 3, 2, 2)
+QUANTITIES = (1, 2, 3, 5, 10)
+QUANTITY_WEIGHTS = (70, 15, 8, 5, 2)
+CATALOG_SIZE = 2000
+# Fixed, so the same arguments give the same data on any day
+DEFAULT_END = date(2025, 1, 1)
+
+
+@dataclass(frozen=True)
+class SeedResult:
+    users: int
+    checks: int
+    products: int
+
+
+def _catalog(rnd: random.Random) -> list[tuple[str, Decimal]]:
+    # Log-normal prices, from a few hryvnias to a few thousands
+    return [(f"Product {number:04d}", Decimal(math.exp(rnd.gauss(4.5, 1.2))).quantize(CENT) + CENT)
+            for number in range(CATALOG_SIZE)]
+
+
+def _timestamps(rnd: random.Random, count: int, start: datetime, seconds: int) -> list[datetime]:
+    return sorted(start + timedelta(seconds=rnd.randrange(seconds), microseconds=rnd.randrange(1_000_000))
+                  for _ in range(count))
+
+
+def generate_checks(rnd: random.Random, user_ids: list[int], checks: int, max_products: int, end: date,
+                    days: int, first_check_id: int, first_product_id: int) -> Iterator[tuple[dict, list[dict]]]:
+    """
+    Generate checks with their product lines, in id order.
+    Users get a long-tailed share of the checks (a few large merchants, many small ones),
+    product names and prices come from a fixed catalog with popular items sold more often.
+
+    :return: An iterator of (check row, product rows) with explicit ids
+    """
+    catalog = _catalog(rnd)
+    popularity = [1 / (rank + 1) for rank in range(CATALOG_SIZE)]
+    weights = [rnd.paretovariate(1.2) for _ in user_ids]
+    owners = rnd.choices(user_ids, weights=weights, k=checks)
+    start = datetime.combine(end - timedelta(days=days), time.min)
+    created = _timestamps(rnd, checks, start, days * 24 * 3600)
+    lines = [count for count in LINES_PER_CHECK if count <= max_products] or [1]
+    product_id = first_product_id
+    for offset, (user_id, created_at) in enumerate(zip(owners, created)):
+        check_id = first_check_id + offset
+        products, total = [], Decimal(0)
+        count = rnd.choices(lines, weights=LINES_WEIGHTS[:len(lines)])[0]
+        for name, price in rnd.choices(catalog, weights=popularity, k=count):
+            quantity = rnd.choices(QUANTITIES, weights=QUANTITY_WEIGHTS)[0]
+            line_total = price * quantity
+            products.append({"id": product_id, "check_id": check_id, "name": name, "price": price,
+                             "quantity": quantity, "total": line_total})
+            product_id += 1
+            total += line_total
+        if rnd.random() < 0.6:
+            payment_type, amount = "cashless", total
+        else:
+            # Cash is handed over in round sums
+            step = rnd.choice((10, 50, 100, 500))
+            payment_type, amount = "cash", Decimal(math.ceil(total / step) * step)
+        yield ({"id": check_id, "user_id": user_id, "created_at": created_at, "payment_type": payment_type,
+                "payment_amount": amount, "total": total, "rest": amount - total}, products)
+
+
+async def _next_id(db: AsyncSession, model) -> int:
+    return (await db.scalar(select(func.max(model.id)))) or 0
+
+
+async def _write_rows(db: AsyncSession, table: Table, rows: list[dict]) -> None:
+    if not rows:
+        return
+    connection = await db.connection()
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "asyncpg":
+        raw = await connection.get_raw_connection()
+        columns = list(rows[0])
+        await raw.driver_connection.copy_records_to_table(
+            table.name, records=[tuple(row[column] for column in columns) for row in rows], columns=columns
+        )
+    else:
+        await db.execute(insert(table), rows)
+
+
+async def _reset_sequences(db: AsyncSession) -> None:
+    # Rows were written with explicit ids, move the Postgres sequences past them
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for table in ("users", "checks", "products"):
+        await db.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                              f"(SELECT coalesce(max(id), 1) FROM {table}))"))
+
+
+async def seed_database(db: AsyncSession, password_hash: str, users: int, checks: int, seed: int = 0,
+                        max_products: int = 20, days: int = 365, end: date = DEFAULT_END,
+                        batch_size: int = 10000) -> SeedResult:
+    """
+    Fill the database with generated users, checks and products.
+    The same arguments produce the same data; rows get explicit ids after the existing ones
+    and are written with COPY on asyncpg and multi-row INSERTs elsewhere, batch_size checks per transaction.
+    The daily stats are rebuilt at the end.
+
+    :param db: AsyncSession: The database session
+    :param password_hash: str: Password hash stored for every user
+    :param users: int: Number of users to create
+    :param checks: int: Number of checks to create, shared among the new users
+    :param seed: int: Seed of the random generator
+    :param max_products: int: Largest number of product lines on a check
+    :param days: int: Checks are spread over this many days before end
+    :param end: date: Day after the last check
+    :param batch_size: int: Checks written per transaction
+    :return: SeedResult: Number of rows created
+    """
+    rnd = random.Random(seed)
+    first_user_id = await _next_id(db, User) + 1
+    registered = datetime.combine(end - timedelta(days=days + 1), time.min)
+    user_rows = [
+        {"id": user_id, "username": f"user{user_id}", "business_name": f"FOP User {user_id}",
+         "email": f"user{user_id}@example.com", "password": password_hash, "refresh_token": None,
+         "created_at": registered, "updated_at": registered}
+        for user_id in range(first_user_id, first_user_id + users)
+    ]
+    await _write_rows(db, User.__table__, user_rows)
+    await db.commit()
+
+    check_rows, product_rows, product_count = [], [], 0
+    generated = generate_checks(rnd, [row["id"] for row in user_rows], checks if users else 0, max_products,
+                                end, days, await _next_id(db, Check) + 1, await _next_id(db, Product) + 1)
+    for check_row, products in generated:
+        check_rows.append(check_row)
+        product_rows.extend(products)
+        if len(check_rows) >= batch_size:
+            await _write_rows(db, Check.__table__, check_rows)
+            await _write_rows(db, Product.__table__, product_rows)
+            await db.commit()
+            product_count += len(product_rows)
+            check_rows, product_rows = [], []
+    await _write_rows(db, Check.__table__, check_rows)
+    await _write_rows(db, Product.__table__, product_rows)
+    product_count += len(product_rows)
+    await _reset_sequences(db)
+    await db.commit()
+    await rebuild_daily_stats(db)
+    return SeedResult(users=users, checks=checks if users else 0, products=product_count)
@@ -0,0 +1,151 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable
+
+from fastapi import Depends
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.db import get_db
+from src.database.models import Check, CheckDailyStats, truncate_datetime
+from src.filters.check import CheckFilter
+from src.schemas.check import StatsGranularityEnum
+
+UPSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def start_of_day(value: datetime) -> datetime:
+    return datetime.combine(value.date(), time.min)
+
+
+async def _recount_days(days: Iterable[datetime], user_id: int, db: AsyncSession) -> None:
+    # Without a dialect upsert the rollup rows of the days are recomputed from the checks, portable SQL only
+    for day in sorted(days):
+        aggregate = (
+            select(Check.payment_type, func.count(Check.id), func.sum(Check.total),
+                   func.sum(Check.rest), func.sum(Check.payment_amount))
+            .where(Check.user_id == user_id, Check.created_at >= day, Check.created_at < day + timedelta(days=1))
+            .group_by(Check.payment_type)
+        )
+        rows = [
+            {"user_id": user_id, "day": day, "payment_type": payment_type, "count": count,
+             "sum_total": total, "sum_rest": rest, "sum_payment_amount": payment_amount}
+            for payment_type, count, total, rest, payment_amount in await db.execute(aggregate)
+        ]
+        await db.execute(delete(CheckDailyStats).where(CheckDailyStats.user_id == user_id,
+                                                       CheckDailyStats.day == day))
+        if rows:
+            await db.execute(insert(CheckDailyStats), rows)
+
+
+async def add_to_daily_stats(checks: Iterable[tuple[datetime, str, Decimal, Decimal, Decimal]], user_id: int,
+                             db: AsyncSession = Depends(get_db)) -> None:
+    """
+    Add new checks to the daily rollup with one INSERT ... ON CONFLICT DO UPDATE.
+    Databases without such an upsert get the rollup rows of the days recomputed from the checks instead,
+    so the checks must already be inserted. Meant to run in the transaction that inserts the checks, the caller is responsible for the commit.
+
+    :param checks: Iterable: The (created_at, payment_type, payment_amount, total, rest) of every check
+    :param user_id: int: Owner of the checks
+    :param db: AsyncSession: The database session
+    :return: None
+    """
+    totals: dict[tuple[datetime, str], list] = {}
+    for created_at, payment_type, payment_amount, total, rest in checks:
+        entry = totals.setdefault((start_of_day(created_at), payment_type), [0, 0, 0, 0])
+        entry[0] += 1
+        entry[1] += total
+        entry[2] += rest
+        entry[3] += payment_amount
+    if not totals:
+        return
+    upsert_factory = UPSERTS.get(db.get_bind().dialect.name)
+    if upsert_factory is None:
+        await _recount_days({day for day, _ in totals}, user_id, db)
+        return
+    # Rows in key order, so concurrent transactions lock them in the same order
+    rows = [
+        {"user_id": user_id, "day": day, "payment_type": payment_type, "count": count,
+         "sum_total": total, "sum_rest": rest, "sum_payment_amount": payment_amount}
+        for (day, payment_type), (count, total, rest, payment_amount) in sorted(totals.items())
+    ]
+    upsert = upsert_factory(CheckDailyStats).values(rows)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[CheckDailyStats.user_id, CheckDailyStats.day, CheckDailyStats.payment_type],
+        set_={
+            "count": CheckDailyStats.count + upsert.excluded.count,
+            "sum_total": CheckDailyStats.sum_total + upsert.excluded.sum_total,
+            "sum_rest": CheckDailyStats.sum_rest + upsert.excluded.sum_rest,
+            "sum_payment_amount": CheckDailyStats.sum_payment_amount + upsert.excluded.sum_payment_amount,
+        },
+    )
+    await db.execute(upsert)
+
+
+async def rebuild_daily_stats(db: AsyncSession, user_id: int | None = None) -> int:
+    """
+    Recompute the daily rollup from the checks table with one INSERT ... SELECT ... GROUP BY.
+    On Postgres new checks wait for the rebuild to commit, so none of them is lost or counted twice.
+
+    :param db: AsyncSession: The database session
+    :param user_id: int: Rebuild only the rows of this user, all users when None
+    :return: int: Number of rollup rows written
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text("LOCK TABLE checks IN SHARE MODE"))
+    day = truncate_datetime("day", Check.created_at)
+    clear = delete(CheckDailyStats)
+    aggregate = (
+        select(Check.user_id, day, Check.payment_type, func.count(Check.id),
+               func.sum(Check.total), func.sum(Check.rest), func.sum(Check.payment_amount))
+        .group_by(Check.user_id, day, Check.payment_type)
+    )
+    if user_id is not None:
+        clear = clear.where(CheckDailyStats.user_id == user_id)
+        aggregate = aggregate.where(Check.user_id == user_id)
+    await db.execute(clear)
+    result = await db.execute(
+        insert(CheckDailyStats).from_select(
+            ["user_id", "day", "payment_type", "count", "sum_total", "sum_rest", "sum_payment_amount"], aggregate
+        )
+    )
+    await db.commit()
+    return result.rowcount
+
+
+def covered_by_daily_stats(check_filter: CheckFilter, granularity: StatsGranularityEnum) -> bool:
+    """
+    Check whether the stats request can be answered from the daily rollup:
+    day granularity, no payment amount filters and a range made of whole days.
+    """
+    date_from, date_to = check_filter.created_at__gte, check_filter.created_at__lte
+    return (granularity == StatsGranularityEnum.day
+            and check_filter.payment_amount__gte is None
+            and check_filter.payment_amount__lte is None
+            and (date_from is None or date_from.time() == time.min)
+            and (date_to is None or date_to.time() == time.max))
+
+
+async def get_daily_stats(check_filter: CheckFilter, user_id: int,
+                          db: AsyncSession = Depends(get_db)) -> list[CheckDailyStats]:
+    """
+    Read the rollup rows of the user for the days and payment type of the filter, in day order.
+
+    :param check_filter: Filter class, see covered_by_daily_stats
+    :param user_id: int: Owner of the checks
+    :param db: AsyncSession: The database session
+    :return: The rollup rows
+    """
+    query = select(CheckDailyStats).where(CheckDailyStats.user_id == user_id)
+    if check_filter.created_at__gte is not None:
+        query = query.where(CheckDailyStats.day >= start_of_day(check_filter.created_at__gte))
+    if check_filter.created_at__lte is not None:
+        query = query.where(CheckDailyStats.day <= start_of_day(check_filter.created_at__lte))
+    if check_filter.payment_type is not None:
+        query = query.where(CheckDailyStats.payment_type == check_filter.payment_type.value)
+    result = await db.scalars(query.order_by(CheckDailyStats.day, CheckDailyStats.payment_type))
+    return list(result)
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.db import get_db
 from src.database.models import User
 from src.schemas.user import UserSchema
+from src.services.cache import user_cache
 
 
 async def get_user_by_email(email: str, db: AsyncSession = Depends(get_db)):
@@ -65,6 +66,7 @@ async def update_token(user: User, token: str | None, db: AsyncSession):
     :return: The user
     :doc-author: Babenko Vladyslav
     """
+    user_cache.invalidate(user.email)
     user.refresh_token = token
     await db.commit()
 
@@ -1,53 +1,68 @@
 
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
 from fastapi.templating import Jinja2Templates
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, status, Query
+from fastapi.responses import StreamingResponse
 from fastapi_filter import FilterDepends
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
-from src.database.models import User
+from src.database.db import get_db, get_read_db, get_read_session_factory
+from src.schemas.user import CurrentUser
 from src.repository import check as repository_check
 from src.services.auth import auth_service
-from src.schemas.check import CheckRequest, CheckResponse, CheckResponseList
+from src.services.export import ExportFormatEnum, MEDIA_TYPES, export_chunks
+from src.services.json_response import FastJSONResponse
+from src.services.pagination import decode_cursor
+from src.services.qr import warm_qr_views
+from src.schemas.check import (CheckRequest, CheckResponse, CheckResponseList, CheckBatchItemResponse,
+                               CheckBatchResponse, CheckStatsResponse, StatsGranularityEnum)
 from src.filters.check import CheckFilter
 from src.conf.config import config
 from src.conf import messages
 
 
-router = APIRouter(prefix='/check', tags=['check'])
+router = APIRouter(prefix='/check', tags=['check'], default_response_class=FastJSONResponse)
 
 
 
-@router.post("/", response_model=CheckResponse, status_code=status.HTTP_201_CREATED)
-async def create_check(
-        body: CheckRequest,
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(auth_service.get_current_user)) -> CheckResponse:
+def calculate_totals(body: CheckRequest) -> tuple[Decimal, Decimal]:
     """
-    The function of creating a receipt for the sale of goods.
+    Calculate the total of the products and the change for the payment.
     :param body: CheckRequest: The input data
-    :param db: AsyncSession: Get the database session
-    :param current_user: Get the current user from the database
-    :return: The new check object
+    :return: The total and the rest
     """
     total = sum([product.price * product.quantity for product in body.products])
     rest = body.payment.amount - total
+    return total, rest
 
-    if rest < 0:
-        raise HTTPException(status_code=400, detail=messages.PAYMENT_AMOUNT_INVALID)
-    check_id, check_created_at, business_name = await repository_check.create_check(body, current_user, total, rest, db)
-    await repository_check.create_products(products=body.products, check_id=check_id, db=db)
+
+def build_check_response(body: CheckRequest, check_id: int, created_at: datetime, business_name: str,
+                         total: Decimal, rest: Decimal) -> CheckResponse:
+    """
+    Build the response for a check that was just created from the request data.
+    :param body: CheckRequest: The input data
+    :param check_id: ID of the new check
+    :param created_at: Creation time of the new check
+    :param business_name: Business name of the check owner
+    :param total: Total payment amount
+    :param rest: Rest amount for user
+    :return: The new check object
+    """
     products_response = [
         {"name": item.name, "price": item.price, "quantity": item.quantity, "total": item.price * item.quantity}
         for item in body.products
     ]
-    check_response = CheckResponse(
+    return CheckResponse(
         id=check_id,
         products=products_response,
         payment=body.payment.dict(),
         total=total,
         rest=rest,
-        created_at=check_created_at,
+        created_at=created_at,
         business_name=business_name,
         links={
             "link_html": f"{config.DOMAIN}/{check_id}/html",
@@ -56,23 +71,105 @@ async def create_check(
         }
 
     )
-    return check_response
+
+
+@router.post("/", response_model=CheckResponse, status_code=status.HTTP_201_CREATED)
+async def create_check(
+        body: CheckRequest,
+        background_tasks: BackgroundTasks,
+        db: AsyncSession = Depends(get_db),
+        current_user: CurrentUser = Depends(auth_service.get_current_user)) -> FastJSONResponse:
+    """
+    The function of creating a receipt for the sale of goods.
+    :param body: CheckRequest: The input data
+    :param background_tasks: BackgroundTasks: Renders the QR codes after the response when QR_EAGER is set
+    :param db: AsyncSession: Get the database session
+    :param current_user: Get the current user from the database
+    :return: The new check object
+    """
+    total, rest = calculate_totals(body)
+
+    if rest < 0:
+        raise HTTPException(status_code=400, detail=messages.PAYMENT_AMOUNT_INVALID)
+    check_id, check_created_at, business_name = await repository_check.create_check(body, current_user, total, rest, db)
+    if config.QR_EAGER:
+        background_tasks.add_task(warm_qr_views, [(check_id, check_created_at)])
+    return FastJSONResponse(build_check_response(body, check_id, check_created_at, business_name, total, rest),
+                            status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/batch", response_model=CheckBatchResponse, status_code=status.HTTP_200_OK)
+async def create_checks_batch(
+        body: List[CheckRequest],
+        background_tasks: BackgroundTasks,
+        db: AsyncSession = Depends(get_db),
+        current_user: CurrentUser = Depends(auth_service.get_current_user)) -> FastJSONResponse:
+    """
+    The function creates many receipts in one request, e.g. when a terminal flushes its offline buffer.
+    Every check is validated on its own; invalid checks are reported and skipped, the valid ones are written
+    with multi-row inserts, in one transaction or in chunks of CHECK_BATCH_CHUNK_SIZE checks.
+    :param body: List[CheckRequest]: The input data
+    :param background_tasks: BackgroundTasks: Renders the QR codes after the response when QR_EAGER is set
+    :param db: AsyncSession: Get the database session
+    :param current_user: Get the current user from the database
+    :return: The result for every check, in the order of the input
+    """
+    if len(body) > config.CHECK_BATCH_MAX_SIZE:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=messages.BATCH_TOO_LARGE)
+
+    items: list[CheckBatchItemResponse | None] = [None] * len(body)
+    valid = []
+    for index, check in enumerate(body):
+        total, rest = calculate_totals(check)
+        if rest < 0:
+            items[index] = CheckBatchItemResponse(index=index, status_code=status.HTTP_400_BAD_REQUEST,
+                                                  detail=messages.PAYMENT_AMOUNT_INVALID)
+        else:
+            valid.append((index, check, total, rest))
+
+    chunk_size = config.CHECK_BATCH_CHUNK_SIZE or len(valid) or 1
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        try:
+            created = await repository_check.create_checks(
+                [(check, total, rest) for _, check, total, rest in chunk], current_user.id, db
+            )
+        except SQLAlchemyError:
+            await db.rollback()
+            for index, _, _, _ in chunk:
+                items[index] = CheckBatchItemResponse(index=index,
+                                                      status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                                      detail=messages.BATCH_WRITE_FAILED)
+            continue
+        for (index, check, total, rest), (check_id, created_at) in zip(chunk, created):
+            check_response = build_check_response(check, check_id, created_at, current_user.business_name,
+                                                  total, rest)
+            items[index] = CheckBatchItemResponse(index=index, status_code=status.HTTP_201_CREATED,
+                                                  check=check_response)
+
+    if config.QR_EAGER:
+        background_tasks.add_task(warm_qr_views, [(item.check.id, item.check.created_at)
+                                                  for item in items if item.check is not None])
+    created_count = sum(1 for item in items if item.status_code == status.HTTP_201_CREATED)
+    return FastJSONResponse(CheckBatchResponse(items=items, created=created_count, failed=len(items) - created_count))
 
 
 @router.get("/find/{check_id}", response_model=CheckResponse, status_code=status.HTTP_200_OK)
-async def read_check(check_id: int, db: AsyncSession = Depends(get_db),
-                     current_user: User = Depends(auth_service.get_current_user)) -> CheckResponse:
+async def read_check(check_id: int, db: AsyncSession = Depends(get_read_db),
+                     primary_db: AsyncSession = Depends(get_db),
+                     current_user: CurrentUser = Depends(auth_service.get_current_user)) -> FastJSONResponse:
     """
         The function return a receipt by id.
         :param check_id: Unique check id.
         :param db: AsyncSession: Get the database session
+        :param primary_db: AsyncSession: Get the primary session, read when a replica misses the check
         :param current_user: Get the current user from the database
         :return: The check object
         """
-    check = await repository_check.get_check_by_id(check_id, current_user, db)
+    check = await repository_check.get_check_by_id_read_your_writes(check_id, current_user, db, primary_db)
     if check is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Check ID: {check_id} not found")
-    return check
+    return FastJSONResponse(check)
 
 
 @router.get("/select", response_model=CheckResponseList)
@@ -80,19 +177,82 @@ async def get_checks(
         check_filter: CheckFilter = FilterDepends(CheckFilter, by_alias=True),
         page: int = Query(ge=0, default=0),
         per_page: int = Query(ge=1, le=100, default=10),
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(auth_service.get_current_user)
-) -> dict[str, int | list[CheckResponse]]:
+        cursor: str | None = Query(default=None, description="next_cursor from the previous page"),
+        db: AsyncSession = Depends(get_read_db),
+        current_user: CurrentUser = Depends(auth_service.get_current_user)
+) -> FastJSONResponse:
     """
-    The function use filters to return more specific results
+    The function use filters to return more specific results.
+    Pass next_cursor of the previous response as cursor to walk the pages in constant time;
+    the page parameter is ignored and the total is not counted in this mode.
     :param check_filter: Filter class
+    :param page: Page number for offset paging
+    :param per_page: Items per page
+    :param cursor: Opaque cursor for keyset paging
     :param db: AsyncSession: Get the database session
     :param current_user: Get the current user from the database
     :return: List with CheckResponse objects
     """
-    checks = await repository_check.get_checks_by_filter(check_filter, current_user, page, per_page, db)
-    return checks
+    position = None
+    if cursor is not None:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=messages.CURSOR_INVALID)
+    checks = await repository_check.get_checks_by_filter(check_filter, current_user, page, per_page, db,
+                                                         cursor=position)
+    return FastJSONResponse(CheckResponseList.model_construct(**checks))
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_checks(
+        check_filter: CheckFilter = FilterDepends(CheckFilter, by_alias=True),
+        export_format: ExportFormatEnum = Query(alias="format", default=ExportFormatEnum.ndjson),
+        line_width: int = Query(ge=28, default=32),
+        read_session=Depends(get_read_session_factory),
+        current_user: CurrentUser = Depends(auth_service.get_current_user)
+) -> StreamingResponse:
+    """
+    The function streams every check matching the filters as NDJSON (one check per line)
+    or CSV (one row per product line), or as printable TXT receipts for bulk printing.
+    Sending starts with the first rows read from the database.
+    :param check_filter: Filter class
+    :param export_format: ndjson, csv or txt
+    :param line_width: The width of text receipts
+    :param read_session: Opens the read session used while the body is sent
+    :param current_user: Get the current user from the database
+    :return: Streaming response with the checks
+    """
+    async def content():
+        async with read_session() as db:
+            checks = repository_check.stream_checks_by_filter(check_filter, current_user, db)
+            try:
+                async for chunk in export_chunks(checks, export_format, line_width):
+                    yield chunk
+            finally:
+                await checks.aclose()
 
+    filename = f"checks.{export_format.value}"
+    return StreamingResponse(content(), media_type=MEDIA_TYPES[export_format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
 
 
+@router.get("/stats", response_model=CheckStatsResponse)
+async def get_check_stats(
+        check_filter: CheckFilter = FilterDepends(CheckFilter, by_alias=True),
+        granularity: StatsGranularityEnum = Query(default=StatsGranularityEnum.day),
+        db: AsyncSession = Depends(get_read_db),
+        current_user: CurrentUser = Depends(auth_service.get_current_user)
+) -> FastJSONResponse:
+    """
+    The function returns the number of checks, the sums of totals and change and the average ticket
+    per day or hour and payment type, for the checks matching the filters.
+    :param check_filter: Filter class
+    :param granularity: day or hour
+    :param db: AsyncSession: Get the database session
+    :param current_user: Get the current user from the database
+    :return: The aggregates ordered by period
+    """
+    entries = await repository_check.get_check_stats(check_filter, current_user, granularity, db)
+    return FastJSONResponse(CheckStatsResponse(granularity=granularity, entries=entries))
@@ -1,86 +1,102 @@
-import qrcode
-
-from io import BytesIO
-from fastapi.responses import Response, HTMLResponse, StreamingResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import Response, HTMLResponse
 from fastapi import APIRouter, HTTPException, Depends, status, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.conf.config import config
-from src.database.db import get_db
+from src.database.db import get_db, get_read_session_factory
 from src.repository import check as repository_check
-from src.services.check import CheckView
+from src.schemas.check import CheckResponse
+from src.services.qr import QRFormatEnum, qr_view_key, render_qr_view
+from src.services.render import render_receipt_html, render_receipt_text, run_renderer
+from src.services.view_cache import RenderedView, cached_view
 
 router = APIRouter(tags=['view'])
-templates = Jinja2Templates(directory="src/templates")
+
+
+async def get_check_or_404(check_id: int, read_session, primary_db: AsyncSession) -> CheckResponse:
+    # Only called on a view cache miss, so cache hits do not check out a replica connection
+    async with read_session() as db:
+        check = await repository_check.get_check_by_id_read_your_writes(check_id, None, db, primary_db)
+    if check is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Check ID: {check_id} not found")
+    return check
 
 
 @router.get("/{check_id}/html", response_class=HTMLResponse)
 async def show_check_html(check_id: int,
                           request: Request,
-                          db: AsyncSession = Depends(get_db)) -> HTMLResponse:
+                          read_session=Depends(get_read_session_factory),
+                          primary_db: AsyncSession = Depends(get_db)) -> Response:
     """
         The function return a HTML view of check.
+        The page is rendered once in the render pool and then served from the view cache.
         :param request: Request object
         :param check_id: Unique check id.
-        :param db: AsyncSession: Get the database session
+        :param read_session: Opens the read session, on a view cache miss only
+        :param primary_db: AsyncSession: Get the primary session, read when a replica misses the check
         :return: The check text HTML
         """
-    check = await repository_check.get_check_by_id(check_id=check_id, db=db)
-    if check is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Check ID: {check_id} not found")
-    items = [item.dict() for item in check.products]
-    payment_method = "Картка" if check.payment.type == 'cashless' else 'Готівка'
-    current_time = check.created_at.strftime("%d.%m.%Y об %H:%M:%S")
-    return templates.TemplateResponse("receipt.html",
-                                      {"request": request, "business_name": check.business_name,
-                                       "items": items,
-                                       "total": check.total,
-                                       "payment_method": payment_method,
-                                       "change": check.rest,
-                                       "current_time": current_time})
+    async def render() -> RenderedView:
+        check = await get_check_or_404(check_id, read_session, primary_db)
+        items = [item.dict() for item in check.products]
+        payment_method = "Картка" if check.payment.type == 'cashless' else 'Готівка'
+        current_time = check.created_at.strftime("%d.%m.%Y об %H:%M:%S")
+        content = await run_renderer("html", render_receipt_html,
+                                     {"business_name": check.business_name,
+                                      "items": items,
+                                      "total": check.total,
+                                      "payment_method": payment_method,
+                                      "change": check.rest,
+                                      "current_time": current_time})
+        return RenderedView(content=content, media_type="text/html", last_modified=check.created_at)
+
+    return await cached_view(request, (check_id, "html"), render)
 
 
 @router.get("/{check_id}/txt", response_class=Response)
 async def show_check_txt(check_id: int,
+                         request: Request,
                          line_width: int = Query(ge=28, default=32),
-                         db: AsyncSession = Depends(get_db)) -> Response:
+                         read_session=Depends(get_read_session_factory),
+                         primary_db: AsyncSession = Depends(get_db)) -> Response:
     """
         The function return a TXT view of check.
+        The text is rendered once per line width in the render pool and then served from the view cache.
+        :param request: Request object
         :param line_width: The width of text
         :param check_id: Unique check id.
-        :param db: AsyncSession: Get the database session
+        :param read_session: Opens the read session, on a view cache miss only
+        :param primary_db: AsyncSession: Get the primary session, read when a replica misses the check
         :return: The check text TXT
         """
-    check = await repository_check.get_check_by_id(check_id=check_id, db=db)
-    if check is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Check ID: {check_id} not found")
-    content = CheckView(business_name=check.business_name, items=check.products,
-                        total=check.total, payment_method=check.payment.type, change=check.rest, line_width=line_width)
-    text_content = content.generate()
-    return Response(content=text_content, media_type="text/plain")
+    async def render() -> RenderedView:
+        check = await get_check_or_404(check_id, read_session, primary_db)
+        content = await run_renderer("txt", render_receipt_text, check.business_name, check.products,
+                                     check.total, check.payment.type, check.rest, line_width, check.created_at)
+        return RenderedView(content=content, media_type="text/plain", last_modified=check.created_at)
+
+    return await cached_view(request, (check_id, "txt", line_width), render)
 
 
 @router.get("/{check_id}/qr-code", response_class=Response)
 async def show_check_qr(check_id: int,
+                        request: Request,
                         mode: str = Query(default='html', description="txt or html"),
-                        db: AsyncSession = Depends(get_db)) -> Response:
+                        image_format: QRFormatEnum = Query(alias="format", default=QRFormatEnum.png),
+                        read_session=Depends(get_read_session_factory),
+                        primary_db: AsyncSession = Depends(get_db)) -> Response:
     """
         The function return a QR code view of check.
+        The image is rendered once per mode and format in the render pool and then served from the view cache.
+        :param request: Request object
         :param check_id: Unique check id.
-        :param db: AsyncSession: Get the database session
+        :param mode: The view the QR code links to
+        :param image_format: png (1-bit) or svg
+        :param read_session: Opens the read session, on a view cache miss only
+        :param primary_db: AsyncSession: Get the primary session, read when a replica misses the check
         :return: The check qr code
         """
-    check = await repository_check.get_check_by_id(check_id=check_id, db=db)
-    if check is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Check ID: {check_id} not found")
-    link = f"{config.DOMAIN}/{check.id}/html" if mode == 'html' else f"{config.DOMAIN}/{check.id}/txt"
-    # Generate the QR code image
-    qr = qrcode.QRCode(box_size=10, border=4)
-    qr.add_data(link)
-    qr.make(fit=True)
-    img = qr.make_image(fill="black", back_color="white")
-    img_io = BytesIO()
-    img.save(img_io, format="PNG")
-    img_io.seek(0)
-    return StreamingResponse(img_io, media_type="image/png")
+    async def render() -> RenderedView:
+        check = await get_check_or_404(check_id, read_session, primary_db)
+        return await render_qr_view(check.id, check.created_at, mode, image_format)
+
+    return await cached_view(request, qr_view_key(check_id, mode, image_format), render)
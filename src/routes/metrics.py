@@ -0,0 +1,70 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.database.db import sessionmanager
+from src.services import profiling
+from src.services.auth import auth_service
+from src.services.cache import token_cache, user_cache
+from src.services.metrics import prometheus_family, prometheus_histograms
+from src.services.render import render_executor, render_latency
+from src.services.view_cache import view_cache
+
+router = APIRouter(tags=['metrics'])
+
+CACHES = {"user": user_cache, "token": token_cache, "view": view_cache}
+EXECUTORS = (render_executor, auth_service.hash_executor)
+
+
+def collect_metrics() -> list[str]:
+    """
+    Collect the request, SQL and render timings, cache, worker pool and connection pool figures.
+    Request and SQL timings are only collected with PROFILING_ENABLED.
+    """
+    routes = sorted(profiling.request_latency)
+    lines = []
+    lines += prometheus_histograms(
+        "checkbox_request_duration_seconds", "Wall time of requests by route",
+        [({"method": method, "route": route}, profiling.request_latency[method, route]) for method, route in routes])
+    lines += prometheus_histograms(
+        "checkbox_request_db_duration_seconds", "Time spent in SQL statements per request by route",
+        [({"method": method, "route": route}, profiling.request_db_time[method, route]) for method, route in routes])
+    lines += prometheus_family(
+        "checkbox_request_db_statements_total", "counter", "SQL statements sent by requests by route",
+        [({"method": method, "route": route}, profiling.request_db_statements[method, route])
+         for method, route in routes])
+    lines += prometheus_histograms("checkbox_db_statement_duration_seconds", "Duration of SQL statements",
+                                   [({}, profiling.statement_latency)])
+    lines += prometheus_histograms("checkbox_render_duration_seconds", "Receipt view render time by renderer",
+                                   [({"renderer": name}, histogram) for name, histogram in sorted(render_latency.items())])
+    lines += prometheus_family("checkbox_cache_hits_total", "counter", "Cache hits",
+                               [({"cache": name}, cache.hits) for name, cache in CACHES.items()])
+    lines += prometheus_family("checkbox_cache_misses_total", "counter", "Cache misses",
+                               [({"cache": name}, cache.misses) for name, cache in CACHES.items()])
+    lines += prometheus_family("checkbox_executor_in_flight", "gauge", "Tasks running or queued in a worker pool",
+                               [({"executor": executor.name}, executor.in_flight) for executor in EXECUTORS])
+    lines += prometheus_family("checkbox_executor_queue_depth", "gauge", "Tasks waiting for a worker",
+                               [({"executor": executor.name}, executor.queue_depth) for executor in EXECUTORS])
+    lines += prometheus_family("checkbox_executor_completed_total", "counter", "Tasks completed by a worker pool",
+                               [({"executor": executor.name}, executor.completed) for executor in EXECUTORS])
+    pool = sessionmanager.pool_stats()
+    lines += prometheus_family("checkbox_db_pool_connections", "gauge", "Connections of the primary pool by state",
+                               [({"state": state}, pool[state]) for state in ("checkedin", "checkedout", "overflow")
+                                if state in pool])
+    lines += prometheus_family("checkbox_db_pool_size", "gauge", "Size of the primary pool",
+                               [({}, pool["size"])] if "size" in pool else [])
+    replicas = list(enumerate(pool.get("replicas", [])))
+    lines += prometheus_family("checkbox_db_replica_sessions", "gauge", "Open read sessions by replica",
+                               [({"replica": str(index)}, replica["in_use"]) for index, replica in replicas])
+    lines += prometheus_family("checkbox_db_replica_available", "gauge", "1 when the replica is not marked down",
+                               [({"replica": str(index)}, int(replica["available"])) for index, replica in replicas])
+    return lines
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    The metrics function exposes the application metrics in the Prometheus text format.
+
+    :return: The metrics
+    """
+    return PlainTextResponse("\n".join(collect_metrics()) + "\n", media_type="text/plain; version=0.0.4")
@@ -0,0 +1,67 @@
+from typing import AsyncIterator, List
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from fastapi_filter import FilterDepends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.db import get_read_db, get_read_session_factory
+from src.filters.check import CheckFilter
+from src.repository import products as repository_products
+from src.schemas.product import ProductMetricEnum, ProductSalesResponse
+from src.schemas.user import CurrentUser
+from src.services.auth import auth_service
+from src.services.export import chunked
+
+router = APIRouter(prefix='/products', tags=['products'])
+
+
+@router.get("/top", response_model=List[ProductSalesResponse])
+async def get_top_products(
+        check_filter: CheckFilter = FilterDepends(CheckFilter, by_alias=True),
+        metric: ProductMetricEnum = Query(default=ProductMetricEnum.revenue),
+        limit: int = Query(ge=1, le=100, default=10),
+        db: AsyncSession = Depends(get_read_db),
+        current_user: CurrentUser = Depends(auth_service.get_current_user)
+) -> List[ProductSalesResponse]:
+    """
+    The function returns the best selling products of the checks matching the filters.
+    :param check_filter: Filter class
+    :param metric: Sort by revenue or quantity
+    :param limit: Number of products
+    :param db: AsyncSession: Get the database session
+    :param current_user: Get the current user from the database
+    :return: The products with their quantity, revenue and number of checks, best first
+    """
+    return await repository_products.get_top_products(check_filter, current_user, metric, limit, db)
+
+
+@router.get("/breakdown", response_class=StreamingResponse)
+async def export_product_sales(
+        check_filter: CheckFilter = FilterDepends(CheckFilter, by_alias=True),
+        metric: ProductMetricEnum = Query(default=ProductMetricEnum.revenue),
+        read_session=Depends(get_read_session_factory),
+        current_user: CurrentUser = Depends(auth_service.get_current_user)
+) -> StreamingResponse:
+    """
+    The function streams the sales of every product of the checks matching the filters as NDJSON.
+    :param check_filter: Filter class
+    :param metric: Sort by revenue or quantity
+    :param read_session: Opens the read session used while the body is sent
+    :param current_user: Get the current user from the database
+    :return: Streaming response with one product per line, best first
+    """
+    async def lines(products: AsyncIterator[ProductSalesResponse]) -> AsyncIterator[str]:
+        async for product in products:
+            yield product.model_dump_json() + "\n"
+
+    async def content():
+        async with read_session() as db:
+            products = repository_products.stream_product_sales(check_filter, current_user, metric, db)
+            try:
+                async for chunk in chunked(lines(products)):
+                    yield chunk
+            finally:
+                await products.aclose()
+
+    return StreamingResponse(content(), media_type="application/x-ndjson")
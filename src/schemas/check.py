@@ -1,6 +1,7 @@
 from pydantic import BaseModel, condecimal, conint
 from datetime import datetime
-from typing import List, Literal
+from enum import Enum
+from typing import List, Literal, Optional
 
 
 class ProductRequest(BaseModel):
@@ -67,4 +68,38 @@ class CheckResponseList(BaseModel):
     entries: List[CheckResponse]
     page: int
     per_page: int
-    total: int
+    total: int | None = None
+    next_cursor: str | None = None
+
+
+class CheckBatchItemResponse(BaseModel):
+    index: int
+    status_code: int
+    check: Optional[CheckResponse] = None
+    detail: Optional[str] = None
+
+
+class CheckBatchResponse(BaseModel):
+    items: List[CheckBatchItemResponse]
+    created: int
+    failed: int
+
+
+class StatsGranularityEnum(str, Enum):
+    day = "day"
+    hour = "hour"
+
+
+class CheckStatsEntry(BaseModel):
+    period: datetime
+    payment_type: str
+    count: int
+    total: condecimal(max_digits=14, decimal_places=2)
+    rest: condecimal(max_digits=14, decimal_places=2)
+    payment_amount: condecimal(max_digits=14, decimal_places=2)
+    average: condecimal(max_digits=14, decimal_places=2)
+
+
+class CheckStatsResponse(BaseModel):
+    granularity: StatsGranularityEnum
+    entries: List[CheckStatsEntry]
@@ -0,0 +1,15 @@
+from enum import Enum
+
+from pydantic import BaseModel, condecimal
+
+
+class ProductMetricEnum(str, Enum):
+    revenue = "revenue"
+    quantity = "quantity"
+
+
+class ProductSalesResponse(BaseModel):
+    name: str
+    quantity: condecimal(max_digits=14, decimal_places=2)
+    revenue: condecimal(max_digits=14, decimal_places=2)
+    checks: int
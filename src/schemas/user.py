@@ -19,6 +19,14 @@ class UserResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CurrentUser(BaseModel):
+    id: int
+    username: str
+    email: EmailStr
+    business_name: str
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
 class TokenSchema(BaseModel):
     access_token: str
     refresh_token: str
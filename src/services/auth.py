@@ -1,4 +1,5 @@
 import pickle
+import time
 
 from datetime import datetime, timedelta
 from typing import Optional
@@ -13,6 +14,8 @@ from jose import JWTError, jwt
 from src.database.db import get_db
 from src.repository import users as repository_users
 from src.schemas import user as schemas_user
+from src.services.cache import token_cache, user_cache
+from src.services.executor import BoundedExecutor
 from src.conf.config import config
 from src.conf import messages
 
@@ -23,11 +26,14 @@ class Auth:
     SECRET_KEY = config.SECRET_KEY_JWT
     ALGORITHM = config.ALGORITHM
 
-    def verify_password(self, plain_password, hashed_password):
+    hash_executor = BoundedExecutor("password-hash", max_workers=config.PASSWORD_HASH_WORKERS)
+
+    async def verify_password(self, plain_password, hashed_password):
         """
         The verify_password function takes a plain-text password and hashed
         password as arguments. It then uses the pwd_context object to verify that the
         plain-text password matches the hashed one.
+        bcrypt runs in the hash_executor pool, so the event loop keeps serving other requests.
 
         :param self: Make the function a method of the user class
         :param plain_password: Pass in the password that the user has entered
@@ -35,21 +41,37 @@ class Auth:
         :return: True if the password is correct and false otherwise
         :doc-author: Babenko Vladyslav
         """
-        return self.pwd_context.verify(plain_password, hashed_password)
+        return await self.hash_executor.run(self.pwd_context.verify, plain_password, hashed_password)
 
-    def get_password_hash(self, password: str):
+    async def get_password_hash(self, password: str):
         """
         The get_password_hash function takes a password as input and returns the hash of that password.
         The hash is generated using the pwd_context object, which is an instance of Flask-Bcrypt's Bcrypt class.
+        bcrypt runs in the hash_executor pool, so the event loop keeps serving other requests.
 
         :param self: Represent the instance of the class
         :param password: str: Pass in the password that is being hashed
         :return: A hash of the password
         :doc-author: Babenko Vladyslav
         """
-        return self.pwd_context.hash(password)
+        return await self.hash_executor.run(self.pwd_context.hash, password)
+
 
 
+    def user_claims(self, user) -> dict:
+        """
+        The user_claims function returns the claims identifying the user in a token.
+        With JWT_USER_CLAIMS the id, username and business name are added,
+        so get_current_user can build the user from an access token alone.
+
+        :param self: Represent the instance of the class
+        :param user: User: The user the token is issued for
+        :return: A dictionary with the claims
+        """
+        claims = {"sub": user.email}
+        if config.JWT_USER_CLAIMS:
+            claims.update({"uid": user.id, "username": user.username, "business_name": user.business_name})
+        return claims
 
     async def create_access_token(self, data: dict, expires_delta: Optional[float] = None):
         """
@@ -121,16 +143,19 @@ class Auth:
             self,
             credentials: HTTPAuthorizationCredentials = Depends(bearer_schema),
             db: AsyncSession = Depends(get_db)
-    ):
+    ) -> schemas_user.CurrentUser:
         """
         The get_current_user function is a dependency that will be used in the
             protected endpoints. It takes a token as an argument and returns the user
             if it's valid, or raises an HTTPException with status code 401 if not.
 
+        Verified tokens are cached until they expire. The user is built from the token claims when the token
+        carries them, otherwise it is taken from the user cache or, on a miss, from the database.
+
         :param credentials: str: Get the token from the authorization header
         :param self: Represent the instance of a class
         :param db: AsyncSession: Get the database session
-        :return: A user object
+        :return: A snapshot of the user
         :doc-author: Babenko Vladyslav
         """
         credentials_exception = HTTPException(
@@ -139,19 +164,37 @@ class Auth:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-        try:
-            token = credentials.credentials
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload["scope"] == "access_token":
-                email = payload["sub"]
-                if email is None:
+        token = credentials.credentials
+        cached = token_cache.get(token)
+        if cached is None:
+            try:
+                payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+                if payload["scope"] == "access_token":
+                    email = payload["sub"]
+                    if email is None:
+                        raise credentials_exception
+                else:
                     raise credentials_exception
-            else:
+            except JWTError as e:
                 raise credentials_exception
-        except JWTError as e:
-            raise credentials_exception
-        user = await repository_users.get_user_by_email(email, db)
-        return user
+            token_user = None
+            if {"uid", "username", "business_name"} <= payload.keys():
+                token_user = schemas_user.CurrentUser(id=payload["uid"], username=payload["username"],
+                                                      email=email, business_name=payload["business_name"])
+            cached = (email, token_user)
+            token_cache.set(token, cached, ttl=payload["exp"] - time.time())
+        email, token_user = cached
+        if token_user is not None and config.JWT_USER_CLAIMS:
+            return token_user
+
+        current_user = user_cache.get(email)
+        if current_user is None:
+            user = await repository_users.get_user_by_email(email, db)
+            if user is None:
+                raise credentials_exception
+            current_user = schemas_user.CurrentUser.model_validate(user)
+            user_cache.set(email, current_user)
+        return current_user
 
     async def get_user_info(
             self, user_id: int,
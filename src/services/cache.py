@@ -0,0 +1,250 @@
+import contextlib
+import hashlib
+import os
+import pickle
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from src.conf.config import config
+
+
+class CacheBackend(ABC):
+    """
+    Storage used by the caches of the app. Implement it to keep entries outside the process (e.g. Redis).
+    """
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Return the value stored under the key, or None if it is missing or expired.
+        """
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """
+        Store the value under the key. ttl is the lifetime in seconds, None uses the backend default.
+        """
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        """
+        Remove the key if it is stored.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Remove all keys.
+        """
+
+
+class TTLCache(CacheBackend):
+    """
+    In-process LRU cache with a lifetime per entry.
+    When maxsize entries are stored, the least recently used one is evicted.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SizedLRUCache(CacheBackend):
+    """
+    In-process LRU cache limited by the total size of the stored values instead of their number.
+    Values larger than max_bytes are not stored. Entries do not expire.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.size = 0
+        self._data: OrderedDict[Hashable, tuple[int, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.size -= previous[0]
+            self._data[key] = (size, value)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (evicted_size, _) = self._data.popitem(last=False)
+                self.size -= evicted_size
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is not None:
+                self.size -= item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DiskCache(CacheBackend):
+    """
+    Cache keeping pickled values in files of a local directory, one file per key. Entries do not expire.
+    Only use it for values produced by the app itself.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: Hashable) -> str:
+        return os.path.join(self.directory, hashlib.sha256(repr(key).encode()).hexdigest())
+
+    def get(self, key: Hashable) -> Any | None:
+        try:
+            with open(self._path(key), "rb") as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        path = self._path(key)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(temporary)
+
+    def delete(self, key: Hashable) -> None:
+        with contextlib.suppress(OSError):
+            os.remove(self._path(key))
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(self.directory, name))
+
+
+class TieredCache(CacheBackend):
+    """
+    Two caches used as one: reads try the first (fast) tier, then the second and copy the hit to the first.
+    Writes and deletes go to both.
+    """
+
+    def __init__(self, first: CacheBackend, second: CacheBackend):
+        self.first = first
+        self.second = second
+
+    def get(self, key: Hashable) -> Any | None:
+        value = self.first.get(key)
+        if value is None:
+            value = self.second.get(key)
+            if value is not None:
+                self.first.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        self.first.set(key, value, ttl)
+        self.second.set(key, value, ttl)
+
+    def delete(self, key: Hashable) -> None:
+        self.first.delete(key)
+        self.second.delete(key)
+
+    def clear(self) -> None:
+        self.first.clear()
+        self.second.clear()
+
+
+class CountingCache:
+    """
+    Front of a CacheBackend that counts hits and misses. The backend can be replaced at runtime.
+    """
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        value = self.backend.get(key) if self.enabled else None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        if self.enabled:
+            self.backend.set(key, value, ttl)
+
+    def invalidate(self, key: Hashable) -> None:
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# Authenticated users by email, see Auth.get_current_user
+user_cache = CountingCache(TTLCache(maxsize=config.USER_CACHE_SIZE, ttl=config.USER_CACHE_TTL),
+                           enabled=config.USER_CACHE_ENABLED)
+
+# Verified access tokens, see Auth.get_current_user
+token_cache = CountingCache(TTLCache(maxsize=config.TOKEN_CACHE_SIZE, ttl=0))
@@ -1,14 +1,16 @@
 from datetime import datetime
+from typing import Iterable, Iterator
 
 
 class CheckView:
-    def __init__(self, business_name, items, total, payment_method, change, line_width=32):
+    def __init__(self, business_name, items, total, payment_method, change, line_width=32, created_at=None):
         self.business_name = business_name
         self.items = items
         self.total = total
         self.payment_method = payment_method
         self.change = change
         self.line_width = line_width
+        self.created_at = created_at
 
     def format_item(self, quantity, price, name):
         item_line = f"{quantity} x {price:,.2f}"
@@ -32,9 +34,61 @@ class CheckView:
         lines.append(f"{self.payment_method:<{self.line_width - len(f'{self.total:,.2f}')}}{self.total:,.2f}")
         lines.append(f"{'Решта':<{self.line_width - len(f'{self.change:,.2f}')}}{self.change:,.2f}")
         lines.append(separator)
-        current_time = datetime.now().strftime("%d.%m.%Y %H:%M")
+        current_time = (self.created_at or datetime.now()).strftime("%d.%m.%Y %H:%M")
         lines.append(f"{current_time:^{self.line_width}}")
         lines.append(f"{'Дякуємо за покупку!':^{self.line_width}}")
 
         return "\n".join(lines)
 
+
+class CheckBatchView:
+    """
+    Text renderer for many receipts of one line width, e.g. an end-of-day print run.
+    Produces the same text as CheckView for every check, with the fixed parts of the layout built once
+    and product fields read as attributes instead of dumping every product to a dict.
+    """
+
+    def __init__(self, line_width=32, page_break="\f\n"):
+        self.line_width = line_width
+        self.page_break = page_break
+        self.separator = "=" * line_width
+        self.item_separator = "-" * line_width
+        self.footer = f"{'Дякуємо за покупку!':^{line_width}}"
+
+    def _amount_line(self, label, amount):
+        amount = f"{amount:,.2f}"
+        return f"{label:<{self.line_width - len(amount)}}{amount}"
+
+    def render(self, check) -> str:
+        """
+        Render one check (a CheckResponse or an object with the same attributes).
+        """
+        width = self.line_width
+        lines = [f"{check.business_name:^{width}}", self.separator]
+        for item in check.products:
+            quantity, price = item.quantity, item.price
+            item_line = f"{quantity} x {price:,.2f}"
+            item_total = f"{quantity * price:,.2f}"
+            lines.append(f"{item.name[:width]}\n{item_line:<{width - len(item_total)}}{item_total}")
+            lines.append(self.item_separator)
+        lines.pop()
+        total = f"{check.total:,.2f}"
+        lines.append(self.separator)
+        lines.append(f"{'СУМА':<{width - len(total)}}{total}")
+        lines.append(f"{check.payment.type:<{width - len(total)}}{total}")
+        lines.append(self._amount_line('Решта', check.rest))
+        lines.append(self.separator)
+        lines.append(f"{check.created_at.strftime('%d.%m.%Y %H:%M'):^{width}}")
+        lines.append(self.footer)
+        return "\n".join(lines)
+
+    def stream(self, checks: Iterable) -> Iterator[str]:
+        """
+        Yield the receipts one by one, each followed by the page break.
+        """
+        for check in checks:
+            yield self.render(check)
+            yield self.page_break
+
+    def generate(self, checks: Iterable) -> str:
+        return "".join(self.stream(checks))
@@ -0,0 +1,92 @@
+import csv
+import io
+from enum import Enum
+from typing import AsyncIterator
+
+from src.schemas.check import CheckResponse
+from src.services.check import CheckBatchView
+
+CSV_HEADER = ["check_id", "created_at", "business_name", "payment_type", "payment_amount", "total", "rest",
+              "product_name", "product_price", "product_quantity", "product_total"]
+
+# Bytes collected before a chunk is handed to the server
+CHUNK_SIZE = 64 * 1024
+
+
+class ExportFormatEnum(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+    txt = "txt"
+
+
+MEDIA_TYPES = {
+    ExportFormatEnum.ndjson: "application/x-ndjson",
+    ExportFormatEnum.csv: "text/csv",
+    ExportFormatEnum.txt: "text/plain; charset=utf-8",
+}
+
+
+async def chunked(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Join small pieces of text into chunks of about CHUNK_SIZE characters.
+    """
+    buffer, size = [], 0
+    async for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+async def _ndjson_lines(checks: AsyncIterator[CheckResponse]) -> AsyncIterator[str]:
+    async for check in checks:
+        yield check.model_dump_json() + "\n"
+
+
+async def _csv_lines(checks: AsyncIterator[CheckResponse]) -> AsyncIterator[str]:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_HEADER)
+    async for check in checks:
+        head = [check.id, check.created_at.isoformat(), check.business_name, check.payment.type,
+                check.payment.amount, check.total, check.rest]
+        if check.products:
+            writer.writerows(head + [product.name, product.price, product.quantity, product.total]
+                             for product in check.products)
+        else:
+            writer.writerow(head + ["", "", "", ""])
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+    yield output.getvalue()
+
+
+async def _txt_lines(checks: AsyncIterator[CheckResponse], line_width: int) -> AsyncIterator[str]:
+    view = CheckBatchView(line_width=line_width)
+    async for check in checks:
+        yield view.render(check)
+        yield view.page_break
+
+
+def export_chunks(checks: AsyncIterator[CheckResponse], export_format: ExportFormatEnum,
+                  line_width: int = 32) -> AsyncIterator[str]:
+    """
+    Turn a stream of checks into a stream of text chunks in the requested format.
+    NDJSON has one check per line, CSV has one row per product line,
+    TXT has the printed receipts separated by form feeds.
+
+    :param checks: AsyncIterator[CheckResponse]: Checks to export
+    :param export_format: ExportFormatEnum: ndjson, csv or txt
+    :param line_width: int: Receipt width for txt
+    :return: An async iterator of text chunks
+    """
+    if export_format == ExportFormatEnum.csv:
+        lines = _csv_lines(checks)
+    elif export_format == ExportFormatEnum.txt:
+        lines = _txt_lines(checks, line_width)
+    else:
+        lines = _ndjson_lines(checks)
+    return chunked(lines)
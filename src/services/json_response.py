@@ -0,0 +1,29 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    # Same as FastAPI's encoding of pydantic output: decimals as strings, models in JSON mode
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response serialized without jsonable_encoder and the json module.
+    Pydantic models are dumped by their compiled serializer, anything else by orjson.
+    The bytes are the same as FastAPI's response_model serialization (compact, non-ASCII unescaped),
+    when the route returns this response itself, so the response model is not validated again.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content, by_alias=True)
+        return orjson.dumps(content, default=_default)
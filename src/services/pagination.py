@@ -0,0 +1,32 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, check_id: int) -> str:
+    """
+    Pack the position of the last returned check into an opaque cursor string.
+
+    :param created_at: datetime: Creation time of the last check on the page
+    :param check_id: int: ID of the last check on the page
+    :return: str: URL-safe cursor
+    """
+    raw = json.dumps([created_at.isoformat(), check_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Unpack a cursor produced by encode_cursor.
+
+    :param cursor: str: Cursor from the client
+    :return: tuple[datetime, int]: Creation time and ID of the last seen check
+    :raises ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, check_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(check_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as err:
+        raise ValueError("Invalid cursor") from err
@@ -0,0 +1,164 @@
+import asyncio
+import cProfile
+import glob
+import hmac
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.conf.config import config
+from src.services.metrics import Histogram
+
+
+@dataclass
+class RequestTimings:
+    db_time: float = 0.0
+    db_statements: int = 0
+    render_time: float = 0.0
+
+
+# Timings of the request being handled, set by ProfilingMiddleware
+request_timings: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+# By (method, route path)
+request_latency: defaultdict[tuple[str, str], Histogram] = defaultdict(Histogram)
+request_db_time: defaultdict[tuple[str, str], Histogram] = defaultdict(Histogram)
+request_db_statements: defaultdict[tuple[str, str], int] = defaultdict(int)
+# Duration of every SQL statement sent by an instrumented engine
+statement_latency = Histogram()
+# Only one cProfile profiler can run at a time
+_profiling = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, so a failing statement leaves nothing behind on the pooled connection
+    if context is not None:
+        context.profiling_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "profiling_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    statement_latency.observe(elapsed)
+    timings = request_timings.get()
+    if timings is not None:
+        timings.db_time += elapsed
+        timings.db_statements += 1
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Time every statement of the engine, for the request timings and the statement latency histogram.
+    Calling it again for the same engine does nothing.
+    """
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def write_profile(profiler: cProfile.Profile, name: str) -> None:
+    """
+    Write a profile to PROFILING_DIR and delete the oldest ones beyond PROFILING_MAX_FILES.
+    """
+    os.makedirs(config.PROFILING_DIR, exist_ok=True)
+    profiler.dump_stats(os.path.join(config.PROFILING_DIR, name))
+    profiles = sorted(glob.glob(os.path.join(config.PROFILING_DIR, "*.prof")), key=os.path.getmtime)
+    for path in profiles[:max(len(profiles) - config.PROFILING_MAX_FILES, 0)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def record_render_time(elapsed: float) -> None:
+    timings = request_timings.get()
+    if timings is not None:
+        timings.render_time += elapsed
+
+
+def server_timing(timings: RequestTimings, total: float) -> str:
+    return (f'app;dur={total * 1000:.2f}, '
+            f'db;dur={timings.db_time * 1000:.2f};desc="{timings.db_statements} statements", '
+            f'render;dur={timings.render_time * 1000:.2f}')
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware measuring the wall time, database time and statement count and render time of requests.
+    The timings are sent in the Server-Timing header and collected per route for /metrics.
+
+    A request with the PROFILING_HEADER header set to PROFILING_SECRET, or one picked with PROFILING_SAMPLE_RATE,
+    also runs under cProfile. The profile is written to PROFILING_DIR off the event loop, keeping the latest
+    PROFILING_MAX_FILES, and its file name is sent in the same header of the response,
+    or "busy" when another request is being profiled.
+    cProfile sees everything the event loop runs meanwhile, so profile on an otherwise idle worker.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = config.PROFILING_HEADER.lower().encode()
+
+    def _requested(self, scope) -> bool:
+        secret = config.PROFILING_SECRET.encode()
+        return bool(secret) and any(name == self.header and hmac.compare_digest(value, secret)
+                                    for name, value in scope["headers"])
+
+    def _profile_name(self, scope) -> str | None:
+        requested = self._requested(scope)
+        if not requested and random.random() >= config.PROFILING_SAMPLE_RATE:
+            return None
+        if _profiling:
+            return "busy"
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.prof"
+
+    async def __call__(self, scope, receive, send):
+        global _profiling
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        profile_name = self._profile_name(scope)
+        profiler = None
+        if profile_name not in (None, "busy"):
+            _profiling = True
+            profiler = cProfile.Profile()
+        started = time.perf_counter()
+
+        async def send_with_timings(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(timings, time.perf_counter() - started).encode()))
+                if profile_name is not None:
+                    headers.append((self.header, profile_name.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            if profiler is not None:
+                profiler.enable()
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, write_profile, profiler, profile_name)
+                finally:
+                    _profiling = False
+            request_timings.reset(token)
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else "unmatched")
+            request_latency[key].observe(time.perf_counter() - started)
+            request_db_time[key].observe(timings.db_time)
+            request_db_statements[key] += timings.db_statements
@@ -0,0 +1,123 @@
+from datetime import datetime
+from enum import Enum
+from io import BytesIO
+
+import qrcode
+from PIL import Image
+
+from src.conf.config import config
+from src.services.render import run_renderer
+from src.services.view_cache import RenderedView, view_cache
+
+
+class QRFormatEnum(str, Enum):
+    png = "png"
+    svg = "svg"
+
+
+MEDIA_TYPES = {
+    QRFormatEnum.png: "image/png",
+    QRFormatEnum.svg: "image/svg+xml",
+}
+
+
+def qr_link(check_id: int, mode: str) -> str:
+    return f"{config.DOMAIN}/{check_id}/html" if mode == 'html' else f"{config.DOMAIN}/{check_id}/txt"
+
+
+def qr_view_key(check_id: int, mode: str, image_format: QRFormatEnum) -> tuple:
+    return check_id, "qr", mode == 'html', image_format.value
+
+
+def qr_matrix(link: str) -> list[list[bool]]:
+    """
+    Encode the link into the QR module matrix, quiet zone included.
+    With QR_MASK_PATTERN set the search for the best mask (8 trial encodings) is skipped.
+    """
+    qr = qrcode.QRCode(border=4, mask_pattern=config.QR_MASK_PATTERN)
+    qr.add_data(link)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def render_png(matrix: list[list[bool]], box_size: int) -> bytes:
+    """
+    Draw the matrix as a 1-bit PNG with box_size pixels per module.
+    """
+    size = len(matrix)
+    pixels = bytes(0 if dark else 255 for row in matrix for dark in row)
+    image = Image.frombytes("L", (size, size), pixels).convert("1")
+    if box_size > 1:
+        image = image.resize((size * box_size, size * box_size), Image.NEAREST)
+    output = BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def render_svg(matrix: list[list[bool]], box_size: int) -> bytes:
+    """
+    Draw the matrix as an SVG with a single path, one segment per horizontal run of dark modules.
+    """
+    size = len(matrix)
+    segments = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if row[x]:
+                start = x
+                while x < size and row[x]:
+                    x += 1
+                segments.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+            else:
+                x += 1
+    pixels = size * box_size
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+            f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+            f'<rect width="{size}" height="{size}" fill="#fff"/>'
+            f'<path d="{"".join(segments)}" fill="#000"/></svg>').encode()
+
+
+def render_qr(link: str, image_format: QRFormatEnum, box_size: int) -> bytes:
+    """
+    Render the QR code of the link as PNG or SVG bytes.
+    This is a plain function of its arguments, so it can run in a thread or a process pool.
+
+    :param link: str: The encoded link
+    :param image_format: QRFormatEnum: png or svg
+    :param box_size: int: Pixels per module
+    :return: The image
+    """
+    matrix = qr_matrix(link)
+    if image_format == QRFormatEnum.svg:
+        return render_svg(matrix, box_size)
+    return render_png(matrix, box_size)
+
+
+async def render_qr_view(check_id: int, created_at: datetime, mode: str,
+                         image_format: QRFormatEnum = QRFormatEnum.png) -> RenderedView:
+    """
+    Render the QR code view of a check in the render pool.
+
+    :param check_id: int: Unique check id
+    :param created_at: datetime: Creation time of the check
+    :param mode: str: The view the QR code links to, html or txt
+    :param image_format: QRFormatEnum: png or svg
+    :return: RenderedView: The image ready for the view cache
+    """
+    content = await run_renderer("qr", render_qr, qr_link(check_id, mode), image_format, config.QR_BOX_SIZE)
+    return RenderedView(content=content, media_type=MEDIA_TYPES[image_format], last_modified=created_at)
+
+
+async def warm_qr_views(checks: list[tuple[int, datetime]]) -> None:
+    """
+    Render the PNG QR codes of new checks ahead of the first scan and put them into the view cache.
+    Meant to run as a background task after the check is created.
+
+    :param checks: list: The ID and creation time of every check
+    :return: None
+    """
+    for check_id, created_at in checks:
+        for mode in ('html', 'txt'):
+            key = qr_view_key(check_id, mode, QRFormatEnum.png)
+            if view_cache.backend.get(key) is None:
+                view_cache.set(key, await render_qr_view(check_id, created_at, mode))
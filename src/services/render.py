@@ -0,0 +1,77 @@
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable
+
+from jinja2 import Environment, FileSystemLoader
+
+from src.conf.config import config
+from src.services.check import CheckView
+from src.services.executor import BoundedExecutor
+from src.services.metrics import Histogram
+from src.services.profiling import record_render_time
+
+# Receipt views (HTML, TXT, QR) are rendered in this pool, so CPU-bound work does not stall the event loop
+render_executor = BoundedExecutor("render", max_workers=config.RENDER_WORKERS, kind=config.RENDER_EXECUTOR)
+
+# Time from submitting a render to getting its result, queueing included, by renderer name
+render_latency: defaultdict[str, Histogram] = defaultdict(Histogram)
+
+_environment: Environment | None = None
+
+
+def _template_environment() -> Environment:
+    # Created on first use in every worker process
+    global _environment
+    if _environment is None:
+        _environment = Environment(loader=FileSystemLoader("src/templates"), autoescape=True)
+    return _environment
+
+
+def render_receipt_html(context: dict) -> bytes:
+    """
+    Render the receipt.html template. The context must only hold picklable values.
+
+    :param context: dict: Template variables
+    :return: The page encoded as UTF-8
+    """
+    return _template_environment().get_template("receipt.html").render(context).encode()
+
+
+def render_receipt_text(business_name: str, items: list, total, payment_method: str, change,
+                        line_width: int, created_at: datetime) -> bytes:
+    """
+    Render the text receipt with CheckView.
+
+    :return: The text encoded as UTF-8
+    """
+    content = CheckView(business_name=business_name, items=items, total=total,
+                        payment_method=payment_method, change=change, line_width=line_width,
+                        created_at=created_at)
+    return content.generate().encode()
+
+
+async def run_renderer(name: str, func: Callable[..., bytes], *args: Any) -> bytes:
+    """
+    Run a renderer in the render pool and record its latency under the name.
+    func must be a module-level function and args picklable when RENDER_EXECUTOR is process.
+
+    :param name: str: Renderer name used in the latency histograms
+    :param func: Callable: The renderer
+    :param args: Arguments of the renderer
+    :return: The rendered content
+    """
+    started = time.perf_counter()
+    try:
+        return await render_executor.run(func, *args)
+    finally:
+        elapsed = time.perf_counter() - started
+        render_latency[name].observe(elapsed)
+        record_render_time(elapsed)
+
+
+def render_stats() -> dict[str, Any]:
+    return {
+        "executor": render_executor.stats(),
+        "latency": {name: histogram.snapshot() for name, histogram in render_latency.items()},
+    }
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+import queue
+import re
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.conf.config import config
+
+# Statements run with execution_options(slow_query_tag=...) get an EXPLAIN (ANALYZE, BUFFERS) on Postgres
+TAG_OPTION = "slow_query_tag"
+# EXPLAIN prefix by dialect, tagged statements of other dialects are not explained
+EXPLAIN_PREFIXES = {"postgresql": "EXPLAIN (ANALYZE, BUFFERS) "}
+# Plan lines with conditions, where Postgres prints the bound values
+_CONDITION_LINE = re.compile(r"^(\s*(?:->\s*)?(?!Rows Removed)(?:[A-Za-z][A-Za-z -]* )?(?:Cond|Filter|Order By): )(.*)$")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+logger = logging.getLogger("checkbox.slow_query")
+logger.propagate = False
+
+_listener: QueueListener | None = None
+# Last EXPLAIN time by tag, at most one plan per tag every SLOW_QUERY_EXPLAIN_INTERVAL seconds
+_explained: dict[str, float] = {}
+_explain_tasks: set[asyncio.Task] = set()
+
+
+def start_slow_query_log() -> None:
+    """
+    Write the slow query log to SLOW_QUERY_LOG_FILE from a background thread.
+    Requests only put records into a queue, the file is written and rotated by the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    directory = os.path.dirname(config.SLOW_QUERY_LOG_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    file_handler = RotatingFileHandler(config.SLOW_QUERY_LOG_FILE, maxBytes=config.SLOW_QUERY_LOG_MAX_BYTES,
+                                       backupCount=config.SLOW_QUERY_LOG_BACKUPS, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(records))
+    logger.setLevel(logging.INFO)
+    _listener = QueueListener(records, file_handler)
+    _listener.start()
+
+
+def stop_slow_query_log() -> None:
+    """
+    Write the records still in the queue and close the log file.
+    """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    for handler in list(logger.handlers):
+        if isinstance(handler, QueueHandler):
+            logger.removeHandler(handler)
+    _listener = None
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """
+    Describe bind parameters by their types only, so no customer data ends up in the log.
+    """
+    if executemany:
+        parameters = list(parameters)
+        return f"{len(parameters)} x {parameter_shape(parameters[0]) if parameters else '()'}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def redact_plan(plan: str) -> str:
+    """
+    Replace the literals of the condition and filter lines of a plan with ?, the values of the bind parameters
+    are printed there. Costs, row counts, timings and buffers are kept.
+    """
+    lines = []
+    for line in plan.splitlines():
+        match = _CONDITION_LINE.match(line)
+        if match:
+            line = match.group(1) + _LITERAL.sub("?", match.group(2))
+        lines.append(line)
+    return "\n".join(lines)
+
+
+async def _explain(engine: AsyncEngine, tag: str, statement: str, parameters: Any) -> None:
+    try:
+        async with engine.connect() as connection:
+            prefix = EXPLAIN_PREFIXES[connection.dialect.name]
+            result = await connection.exec_driver_sql(prefix + statement, parameters)
+            plan = redact_plan("\n".join(str(row[-1]) for row in result))
+            # ANALYZE runs the statement, nothing it did is kept
+            await connection.rollback()
+    except Exception as err:
+        logger.info("explain tag=%s failed: %r", tag, err)
+        return
+    logger.info("explain tag=%s\n%s", tag, plan)
+
+
+def _schedule_explain(engine: AsyncEngine, tag: str, statement: str, parameters: Any) -> None:
+    # The plan is taken on another connection by a background task, not on the request's connection
+    now = time.monotonic()
+    if now - _explained.get(tag, -float("inf")) < config.SLOW_QUERY_EXPLAIN_INTERVAL:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _explained[tag] = now
+    task = loop.create_task(_explain(engine, tag, statement, parameters))
+    _explain_tasks.add(task)
+    task.add_done_callback(_explain_tasks.discard)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, so a failing statement leaves nothing behind on the pooled connection
+    if context is not None:
+        context.slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "slow_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    if config.SLOW_QUERY_MS <= 0 or elapsed * 1000 < config.SLOW_QUERY_MS:
+        return
+    tag = context.execution_options.get(TAG_OPTION)
+    logger.info("slow query duration_ms=%.1f tag=%s params=%s sql=%s", elapsed * 1000, tag or "-",
+                parameter_shape(parameters, executemany), " ".join(statement.split()))
+    if (config.SLOW_QUERY_EXPLAIN and tag is not None and not executemany
+            and conn.dialect.name in EXPLAIN_PREFIXES and statement.lstrip()[:6].upper() == "SELECT"):
+        _schedule_explain(AsyncEngine(conn.engine), tag, statement, parameters)
+
+
+def instrument_slow_queries(engine: AsyncEngine) -> None:
+    """
+    Log the statements of the engine running longer than SLOW_QUERY_MS with their duration, tag,
+    parameter types and SQL. On Postgres tagged SELECTs also get their plan logged, with the values redacted.
+    Calling it again for the same engine does nothing.
+    """
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
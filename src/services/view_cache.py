@@ -0,0 +1,83 @@
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Hashable
+
+from fastapi import Request, Response, status
+
+from src.conf.config import config
+from src.services.cache import CacheBackend, CountingCache, DiskCache, SizedLRUCache, TieredCache
+
+
+@dataclass(frozen=True)
+class RenderedView:
+    content: bytes
+    media_type: str
+    last_modified: datetime
+    etag: str = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "etag", f'"{hashlib.sha1(self.content).hexdigest()}"')
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": format_datetime(self.last_modified.replace(tzinfo=timezone.utc), usegmt=True),
+            "Cache-Control": f"public, max-age={config.VIEW_CACHE_MAX_AGE}",
+        }
+
+
+def _view_cache_backend() -> CacheBackend:
+    memory = SizedLRUCache(max_bytes=config.VIEW_CACHE_MAX_BYTES, sizeof=lambda view: len(view.content))
+    if config.VIEW_CACHE_DIR:
+        return TieredCache(memory, DiskCache(config.VIEW_CACHE_DIR))
+    return memory
+
+
+# Receipts never change after they are created, so a rendered view stays valid for good
+view_cache = CountingCache(_view_cache_backend())
+
+
+def is_not_modified(request: Request, view: RenderedView) -> bool:
+    """
+    Check the conditional request headers against the view.
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+
+    :param request: Request object
+    :param view: RenderedView: The view that would be sent
+    :return: True if the client copy is up to date
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or view.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        last_modified = view.last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+        return since.tzinfo is not None and last_modified <= since
+    return False
+
+
+async def cached_view(request: Request, key: Hashable, render: Callable[[], Awaitable[RenderedView]]) -> Response:
+    """
+    Return a view from the view cache, rendering and storing it on a miss.
+    Answers 304 Not Modified when the client already has the same content.
+
+    :param request: Request object
+    :param key: Hashable: Check ID and view parameters
+    :param render: Coroutine function producing the view, it may raise HTTPException
+    :return: The response with the view
+    """
+    view = view_cache.get(key)
+    if view is None:
+        view = await render()
+        view_cache.set(key, view)
+    if is_not_modified(request, view):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=view.headers)
+    return Response(content=view.content, media_type=view.media_type, headers=view.headers)
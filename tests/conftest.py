@@ -1,14 +1,16 @@
 import asyncio
+import contextlib
 import os
 import httpx
 import pytest
 import pytest_asyncio
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from main import app
 from src.database.models import Base, User
-from src.database.db import get_db
+from src.database.db import get_db, get_read_db, get_read_session_factory
 from src.services.auth import auth_service
 
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
@@ -55,6 +57,16 @@ async def client(session):
             await session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+
+    @contextlib.asynccontextmanager
+    async def override_read_session():
+        try:
+            yield session
+        finally:
+            await session.close()
+
+    app.dependency_overrides[get_read_session_factory] = lambda: override_read_session
 
     async with httpx.AsyncClient(app=app, base_url="http://testserver") as async_client:
         yield async_client
@@ -107,3 +119,28 @@ def event_loop():
     asyncio.set_event_loop(loop)
     yield loop
     loop.close()
+
+
+@pytest.fixture()
+def count_queries():
+    """
+    Return a context manager collecting the SQL statements sent to the test database inside it.
+
+        with count_queries() as statements:
+            await client.get(...)
+        assert len(statements) == 2
+    """
+    @contextlib.contextmanager
+    def counting():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    return counting
@@ -0,0 +1,34 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from src.schemas.check import CheckResponse, CheckResponseList
+from src.services.json_response import FastJSONResponse
+
+
+def make_check(check_id: int, name: str, price: Decimal) -> CheckResponse:
+    return CheckResponse(id=check_id, products=[{"name": name, "price": price, "quantity": 3, "total": price * 3}],
+                         payment={"type": "cash", "amount": Decimal("1000")}, total=price * 3,
+                         rest=Decimal("1000") - price * 3, created_at=datetime(2024, 2, 29, 23, 59, 59, 123456),
+                         business_name="ФОП Тест \"Ромашка\"", links={"link_html": "http://localhost/1/html",
+                                                                     "link_txt": "", "link_qr": ""})
+
+
+@pytest.mark.asyncio
+async def test_fast_json_response_bytes():
+    """
+    Test that FastJSONResponse produces the same bytes as FastAPI's response_model serialization.
+    """
+    page = {"entries": [make_check(1, "Кава\t☕ 250 мл", Decimal("45.50")),
+                        make_check(2, "Line\nbreak \\ / \u0001", Decimal("0.01")),
+                        make_check(3, "Big", Decimal("2999999.99"))],
+            "page": 0, "per_page": 10, "total": 3, "next_cursor": None}
+    field = create_model_field(name="response", type_=CheckResponseList, mode="serialization")
+    expected = JSONResponse(await serialize_response(field=field, response_content=page)).body
+
+    assert FastJSONResponse(CheckResponseList.model_construct(**page)).body == expected
+    assert FastJSONResponse(CheckResponseList.model_validate(page).model_dump(mode="python")).body == expected
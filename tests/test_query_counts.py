@@ -0,0 +1,97 @@
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from fastapi import status
+
+
+def check_with_products(count: int) -> dict:
+    return {
+        "payment": {"amount": 100000.0, "type": "cash"},
+        "products": [{"name": f"Product {number}", "price": 10.0, "quantity": 1} for number in range(count)],
+    }
+
+
+@pytest_asyncio.fixture()
+async def headers(client: AsyncClient, token: str) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    # Logging in drops the user from the user cache, load it back so the lookup is not counted
+    await client.get("/api/check/select?per_page=1", headers=headers)
+    return headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("products", [1, 20])
+async def test_create_check_statement_count(client: AsyncClient, headers: dict, count_queries, products: int):
+    """
+    Test that creating a check takes the check insert, one products insert and the stats upsert.
+    """
+    with count_queries() as statements:
+        response = await client.post("/api/check/", json=check_with_products(products), headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    assert len(statements) == 3, statements
+
+
+@pytest.mark.asyncio
+async def test_create_batch_statement_count(client: AsyncClient, headers: dict, count_queries):
+    """
+    Test that all product lines and all stats of a batch are written with one statement each.
+    The checks insert needs ordered RETURNING, which SQLite only gets with one row per statement.
+    """
+    with count_queries() as statements:
+        response = await client.post("/api/check/batch", json=[check_with_products(3)] * 10, headers=headers)
+    assert response.json()["created"] == 10
+    assert len([statement for statement in statements if statement.startswith("INSERT INTO checks")]) == 10
+    assert len(statements) == 10 + 2, statements
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("per_page", [1, 10])
+async def test_select_statement_count(client: AsyncClient, headers: dict, count_queries, per_page: int):
+    """
+    Test that a listing page takes the page, its products and the count, whatever the page size.
+    """
+    await client.post("/api/check/batch", json=[check_with_products(2)] * 20, headers=headers)
+    with count_queries() as statements:
+        response = await client.get(f"/api/check/select?per_page={per_page}", headers=headers)
+    assert len(response.json()["entries"]) == per_page
+    assert len(statements) == 3, statements
+
+    with count_queries() as statements:
+        response = await client.get(f"/api/check/select?per_page={per_page}&cursor={response.json()['next_cursor']}",
+                                    headers=headers)
+    assert len(response.json()["entries"]) == per_page
+    assert len(statements) == 2, statements
+
+
+@pytest.mark.asyncio
+async def test_find_and_view_statement_count(client: AsyncClient, headers: dict, count_queries):
+    """
+    Test that a check is read with one statement, and a cached view with none.
+    """
+    response = await client.post("/api/check/", json=check_with_products(5), headers=headers)
+    check_id = response.json()["id"]
+
+    with count_queries() as statements:
+        response = await client.get(f"/api/check/find/{check_id}", headers=headers)
+    assert len(response.json()["products"]) == 5
+    assert len(statements) == 1, statements
+
+    with count_queries() as statements:
+        await client.get(f"/{check_id}/html")
+    assert len(statements) == 1, statements
+
+    with count_queries() as statements:
+        await client.get(f"/{check_id}/html")
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_report_statement_count(client: AsyncClient, headers: dict, count_queries):
+    """
+    Test that stats and product reports are single statements.
+    """
+    for url in ("/api/check/stats", "/api/check/stats?granularity=hour", "/api/products/top"):
+        with count_queries() as statements:
+            response = await client.get(url, headers=headers)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert len(statements) == 1, (url, statements)
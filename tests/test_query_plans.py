@@ -0,0 +1,101 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Select, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Check, Product
+from src.filters.check import CheckFilter
+from src.repository.check import select_checks_by_filter
+from src.repository.products import select_product_sales
+from src.schemas.product import ProductMetricEnum
+
+
+async def explain(session: AsyncSession, query: Select) -> str:
+    """
+    Return the SQLite query plan of the statement as one string.
+    """
+    connection = await session.connection()
+    sql = query.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+    result = await session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+    return "\n".join(row.detail for row in result)
+
+
+@pytest.mark.asyncio
+async def test_listing_uses_user_created_at_index(session: AsyncSession):
+    """
+    Test that the unfiltered listing reads checks through the (user_id, created_at) index.
+    """
+    plan = await explain(session, select_checks_by_filter(CheckFilter(), user_id=1).limit(10))
+
+    assert "ix_checks_user_id_created_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+async def test_listing_with_date_range_uses_user_created_at_index(session: AsyncSession):
+    """
+    Test that a date range is resolved on the (user_id, created_at) index.
+    """
+    check_filter = CheckFilter(created_at__gte=datetime(2024, 1, 1), created_at__lte=datetime(2024, 2, 1))
+    plan = await explain(session, select_checks_by_filter(check_filter, user_id=1).limit(10))
+
+    assert "ix_checks_user_id_created_at (user_id=? AND created_at>? AND created_at<?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+async def test_listing_by_payment_type_uses_payment_type_index(session: AsyncSession):
+    """
+    Test that filtering by payment type uses the (user_id, payment_type, created_at) index.
+    """
+    check_filter = CheckFilter(payment_type="cash")
+    plan = await explain(session, select_checks_by_filter(check_filter, user_id=1).limit(10))
+
+    assert "ix_checks_user_id_payment_type_created_at (user_id=? AND payment_type=?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+async def test_listing_by_payment_amount_uses_an_owner_index(session: AsyncSession):
+    """
+    Test that filtering by payment amount never falls back to a full scan of checks.
+    """
+    check_filter = CheckFilter(payment_amount__gte=Decimal("10.00"), payment_amount__lte=Decimal("99.99"))
+    plan = await explain(session, select_checks_by_filter(check_filter, user_id=1).limit(10))
+
+    assert "SEARCH checks USING INDEX ix_checks_user_id_" in plan
+    assert "SCAN checks" not in plan
+
+
+@pytest.mark.asyncio
+async def test_lookup_uses_primary_key(session: AsyncSession):
+    """
+    Test that the lookup by ID uses the primary key.
+    """
+    plan = await explain(session, select(Check).filter_by(id=1, user_id=1))
+
+    assert "SEARCH checks USING INTEGER PRIMARY KEY" in plan
+
+
+@pytest.mark.asyncio
+async def test_products_load_uses_check_id_index(session: AsyncSession):
+    """
+    Test that product lines of a page are loaded through the check_id index.
+    """
+    plan = await explain(session, select(Product).where(Product.check_id.in_([1, 2, 3])))
+
+    assert "ix_products_check_id (check_id=?)" in plan
+
+
+@pytest.mark.asyncio
+async def test_product_sales_use_owner_and_check_id_indexes(session: AsyncSession):
+    """
+    Test that product sales find the checks by owner and date and their lines by check_id.
+    """
+    check_filter = CheckFilter(created_at__gte=datetime(2024, 1, 1))
+    plan = await explain(session, select_product_sales(check_filter, 1, ProductMetricEnum.revenue).limit(10))
+
+    assert "ix_checks_user_id_created_at (user_id=? AND created_at>?)" in plan
+    assert "ix_products_check_id (check_id=?)" in plan
@@ -2,6 +2,8 @@ import pytest
 
 from fastapi import status
 from src.conf import messages
+from src.conf.config import config
+from src.services.cache import token_cache, user_cache
 
 
 @pytest.mark.asyncio
@@ -128,3 +130,55 @@ async def test_refresh_token_unsuccessful(client, user):
     assert refresh_response.status_code == status.HTTP_401_UNAUTHORIZED
     assert refresh_response.json()["detail"] == messages.CREDENTIALS_INVALID
 
+
+
+@pytest.mark.asyncio
+async def test_current_user_is_cached(client, user, monkeypatch):
+    """
+    Test that the authenticated user is served from the cache after the first request
+    and dropped from it when the user's tokens change.
+    """
+    monkeypatch.setattr(config, "JWT_USER_CLAIMS", False)
+    login_response = await client.post(
+        "/api/auth/login",
+        json={"email": user.get("email"), "password": user.get("password")},
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    assert user_cache.backend.get(user.get("email")) is None
+
+    response = await client.get("/api/check/select", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    cached = user_cache.backend.get(user.get("email"))
+    assert cached.business_name == user.get("business_name")
+
+    hits = user_cache.hits
+    response = await client.get("/api/check/select", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert user_cache.hits == hits + 1
+
+    await client.post(
+        "/api/auth/login",
+        json={"email": user.get("email"), "password": user.get("password")},
+    )
+    assert user_cache.backend.get(user.get("email")) is None
+
+
+@pytest.mark.asyncio
+async def test_current_user_from_token_claims(client, user, monkeypatch):
+    """
+    Test that an access token with user claims is verified once and needs no user lookup.
+    """
+    monkeypatch.setattr(config, "JWT_USER_CLAIMS", True)
+    login_response = await client.post(
+        "/api/auth/login",
+        json={"email": user.get("email"), "password": user.get("password")},
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    user_misses, token_hits = user_cache.misses, token_cache.hits
+
+    for _ in range(3):
+        response = await client.get("/api/check/select", headers=headers)
+        assert response.status_code == status.HTTP_200_OK, response.text
+
+    assert user_cache.misses == user_misses
+    assert token_cache.hits == token_hits + 2
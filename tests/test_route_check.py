@@ -1,8 +1,53 @@
+import contextlib
+import csv
+import io
+import json
+
 import pytest
+import pytest_asyncio
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from fastapi import status
 from datetime import datetime, timedelta
 from src.conf import messages
+from src.conf.config import config
+from src.database.db import get_read_db, get_read_session_factory
+from src.database.models import Base
+from main import app
+from src.repository import stats
+from src.repository.stats import rebuild_daily_stats
+
+
+@pytest_asyncio.fixture()
+async def lagging_replica(client, tmp_path):
+    """
+    Serve reads from an empty replica database that has not received any of the writes yet.
+    Yields the list of the replica sessions opened.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine)
+    opened = []
+    overrides = {dependency: app.dependency_overrides[dependency]
+                 for dependency in (get_read_db, get_read_session_factory)}
+
+    @contextlib.asynccontextmanager
+    async def read_session():
+        async with session_maker() as session:
+            session.info["replica"] = True
+            opened.append(session)
+            yield session
+
+    async def override_get_read_db():
+        async with read_session() as session:
+            yield session
+
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    app.dependency_overrides[get_read_session_factory] = lambda: read_session
+    yield opened
+    app.dependency_overrides.update(overrides)
+    await engine.dispose()
 
 
 @pytest.mark.asyncio
@@ -111,6 +156,73 @@ async def test_create_check_unauthenticated(client: AsyncClient, check_object: d
     assert data["detail"] == messages.NOT_AUTH
 
 
+@pytest.mark.asyncio
+async def test_create_checks_batch(client: AsyncClient, token: str, check_object: dict):
+    """
+    Test that a batch creates the valid checks and reports the invalid ones per item.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    insufficient = {
+        "payment": {"amount": 1.0, "type": "cash"},
+        "products": [{"name": "Mavic 3T", "price": 298870.5, "quantity": 3}],
+    }
+    cheap = {
+        "payment": {"amount": 100.0, "type": "cashless"},
+        "products": [{"name": "Tea", "price": 20.5, "quantity": 2}, {"name": "Cake", "price": 35.0, "quantity": 1}],
+    }
+
+    response = await client.post("/api/check/batch", json=[check_object, insufficient, cheap], headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 1
+    assert [item["index"] for item in data["items"]] == [0, 1, 2]
+    assert data["items"][1]["status_code"] == status.HTTP_400_BAD_REQUEST
+    assert data["items"][1]["detail"] == messages.PAYMENT_AMOUNT_INVALID
+    assert data["items"][1]["check"] is None
+
+    created = data["items"][2]
+    assert created["status_code"] == status.HTTP_201_CREATED
+    assert float(created["check"]["total"]) == 76.0
+    assert float(created["check"]["rest"]) == 24.0
+    assert data["items"][0]["check"]["id"] != created["check"]["id"]
+
+    response = await client.get(f"/api/check/find/{created['check']['id']}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert {product["name"] for product in response.json()["products"]} == {"Tea", "Cake"}
+
+
+@pytest.mark.asyncio
+async def test_create_checks_batch_in_chunks(client: AsyncClient, token: str, check_object: dict, monkeypatch):
+    """
+    Test that a batch written in several transactions still creates every check.
+    """
+    monkeypatch.setattr(config, "CHECK_BATCH_CHUNK_SIZE", 2)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.post("/api/check/batch", json=[check_object] * 5, headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    data = response.json()
+    assert data["created"] == 5
+    assert len({item["check"]["id"] for item in data["items"]}) == 5
+
+
+@pytest.mark.asyncio
+async def test_create_checks_batch_too_large(client: AsyncClient, token: str, check_object: dict, monkeypatch):
+    """
+    Test that a batch above the configured size is rejected.
+    """
+    monkeypatch.setattr(config, "CHECK_BATCH_MAX_SIZE", 2)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.post("/api/check/batch", json=[check_object] * 3, headers=headers)
+
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, response.text
+    assert response.json()["detail"] == messages.BATCH_TOO_LARGE
+
+
 @pytest.mark.asyncio
 async def test_read_check_success(client: AsyncClient, token: str, check_object: dict):
     """
@@ -149,6 +261,30 @@ async def test_read_check_success(client: AsyncClient, token: str, check_object:
     assert "link_qr" in data["links"]
 
 
+@pytest.mark.asyncio
+async def test_create_check_many_products(client: AsyncClient, token: str):
+    """
+    Test that every product line of a large receipt is stored with the check.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    check_object = {
+        "payment": {"amount": 20000.0, "type": "cashless"},
+        "products": [{"name": f"Item {i}", "price": 10.5, "quantity": i + 1} for i in range(50)],
+    }
+
+    create_response = await client.post("/api/check/", json=check_object, headers=headers)
+    assert create_response.status_code == status.HTTP_201_CREATED, create_response.text
+    check_id = create_response.json()["id"]
+
+    response = await client.get(f"/api/check/find/{check_id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    data = response.json()
+    assert sorted(product["name"] for product in data["products"]) == sorted(
+        product["name"] for product in check_object["products"]
+    )
+    assert float(data["total"]) == sum(10.5 * (i + 1) for i in range(50))
+
+
 @pytest.mark.asyncio
 async def test_read_check_not_found(client: AsyncClient, token: str):
     """
@@ -263,6 +399,233 @@ async def test_get_checks_pagination(client: AsyncClient, token: str, check_obje
     assert data["per_page"] == 5
 
 
+@pytest.mark.asyncio
+async def test_get_checks_pagination_pages_are_disjoint(client: AsyncClient, token: str, check_object: dict):
+    """
+    Test that consecutive pages do not overlap and the total does not depend on the page.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for _ in range(3):
+        response = await client.post("/api/check/", json=check_object, headers=headers)
+        assert response.status_code == status.HTTP_201_CREATED, response.text
+
+    first = (await client.get("/api/check/select?page=0&per_page=2", headers=headers)).json()
+    second = (await client.get("/api/check/select?page=1&per_page=2", headers=headers)).json()
+    assert first["total"] == second["total"]
+    first_ids = {check["id"] for check in first["entries"]}
+    second_ids = {check["id"] for check in second["entries"]}
+    assert len(first_ids) == 2
+    assert not first_ids & second_ids
+
+    last_page = first["total"] // 2 + 1
+    response = await client.get(f"/api/check/select?page={last_page}&per_page=2", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    data = response.json()
+    assert data["entries"] == []
+    assert data["total"] == first["total"]
+
+
+@pytest.mark.asyncio
+async def test_get_checks_cursor_walks_all_checks(client: AsyncClient, token: str, check_object: dict):
+    """
+    Test that following next_cursor returns every check exactly once, in the same order as offset paging.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+
+    check_object["payment"]["type"] = "cash"
+    for _ in range(5):
+        response = await client.post("/api/check/", json=check_object, headers=headers)
+        assert response.status_code == status.HTTP_201_CREATED, response.text
+
+    response = await client.get("/api/check/select?payment_type=cash&per_page=100", headers=headers)
+    expected_ids = [check["id"] for check in response.json()["entries"]]
+
+    response = await client.get("/api/check/select?payment_type=cash&per_page=2", headers=headers)
+    data = response.json()
+    walked_ids = [check["id"] for check in data["entries"]]
+    while data["next_cursor"]:
+        response = await client.get(
+            f"/api/check/select?payment_type=cash&per_page=2&cursor={data['next_cursor']}", headers=headers
+        )
+        assert response.status_code == status.HTTP_200_OK, response.text
+        data = response.json()
+        assert data["total"] is None
+        for check in data["entries"]:
+            assert check["payment"]["type"] == "cash"
+        walked_ids.extend(check["id"] for check in data["entries"])
+
+    assert walked_ids == expected_ids
+
+
+@pytest.mark.asyncio
+async def test_get_checks_invalid_cursor(client: AsyncClient, token: str):
+    """
+    Test that a malformed cursor is rejected.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/api/check/select?cursor=not-a-cursor", headers=headers)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST, response.text
+    assert response.json()["detail"] == messages.CURSOR_INVALID
+
+
+@pytest.mark.asyncio
+async def test_export_checks_ndjson(client: AsyncClient, token: str, check_object: dict):
+    """
+    Test that the NDJSON export returns every matching check once, in the listing order.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+
+    check_object["payment"]["type"] = "cashless"
+    for _ in range(3):
+        response = await client.post("/api/check/", json=check_object, headers=headers)
+        assert response.status_code == status.HTTP_201_CREATED, response.text
+
+    listing = await client.get("/api/check/select?payment_type=cashless&per_page=100", headers=headers)
+    expected = listing.json()["entries"]
+
+    response = await client.get("/api/check/export?format=ndjson&payment_type=cashless", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert [check["id"] for check in exported] == [check["id"] for check in expected]
+    assert exported[0]["products"] == expected[0]["products"]
+    assert all(check["payment"]["type"] == "cashless" for check in exported)
+
+
+@pytest.mark.asyncio
+async def test_export_checks_csv(client: AsyncClient, token: str):
+    """
+    Test that the CSV export has one row per product line.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    check_object = {
+        "payment": {"amount": 1000.0, "type": "cash"},
+        "products": [{"name": "Tea", "price": 20.5, "quantity": 2}, {"name": "Cake", "price": 35.0, "quantity": 1}],
+    }
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    check_id = response.json()["id"]
+
+    response = await client.get("/api/check/export?format=csv", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    check_rows = [row for row in rows if row["check_id"] == str(check_id)]
+    assert [row["product_name"] for row in check_rows] == ["Tea", "Cake"]
+    assert check_rows[0]["total"] == "76.00"
+
+
+@pytest.mark.asyncio
+async def test_export_checks_txt(client: AsyncClient, token: str, check_object: dict):
+    """
+    Test that the TXT export prints every receipt exactly as the TXT view of the check does.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    check_id = response.json()["id"]
+
+    response = await client.get("/api/check/export?format=txt&line_width=40", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers["content-type"].startswith("text/plain")
+
+    receipts = response.text.split("\f\n")
+    assert receipts.pop() == ""
+    listing = await client.get("/api/check/select?per_page=1", headers=headers)
+    assert len(receipts) == listing.json()["total"]
+
+    view = await client.get(f"/{check_id}/txt?line_width=40")
+    assert view.text in receipts
+
+
+@pytest.mark.asyncio
+async def test_check_stats(client: AsyncClient, token: str):
+    """
+    Test that the stats aggregate the checks of the date range per period and payment type.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    created = []
+    for payment_type, price in (("cash", 10.0), ("cash", 20.0), ("cashless", 15.5)):
+        check_object = {"payment": {"amount": 100.0, "type": payment_type},
+                        "products": [{"name": "Tea", "price": price, "quantity": 2}]}
+        response = await client.post("/api/check/", json=check_object, headers=headers)
+        assert response.status_code == status.HTTP_201_CREATED, response.text
+        created.append(response.json()["created_at"])
+
+    response = await client.get(f"/api/check/stats?granularity=day&createdAtFrom={created[0]}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    stats = response.json()
+    assert stats["granularity"] == "day"
+    by_type = {entry["payment_type"]: entry for entry in stats["entries"]}
+    assert by_type["cash"]["count"] == 2
+    assert float(by_type["cash"]["total"]) == 60.0
+    assert float(by_type["cash"]["rest"]) == 140.0
+    assert float(by_type["cash"]["average"]) == 30.0
+    assert by_type["cashless"]["count"] == 1
+    assert float(by_type["cashless"]["total"]) == 31.0
+    assert datetime.fromisoformat(by_type["cash"]["period"]) == \
+        datetime.fromisoformat(created[0]).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    response = await client.get("/api/check/stats?granularity=hour", headers=headers)
+    periods = [datetime.fromisoformat(entry["period"]) for entry in response.json()["entries"]]
+    assert periods == sorted(periods)
+    assert all(period.minute == 0 and period.second == 0 for period in periods)
+
+    tomorrow = (datetime.fromisoformat(created[-1]) + timedelta(days=1)).isoformat()
+    response = await client.get(f"/api/check/stats?createdAtFrom={tomorrow}", headers=headers)
+    assert response.json()["entries"] == []
+
+
+@pytest.mark.asyncio
+async def test_check_stats_rollup(client: AsyncClient, token: str, check_object: dict, session, monkeypatch):
+    """
+    Test that day stats over whole days read from the rollup match the stats computed from the checks,
+    before and after the rollup is rebuilt.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    created_at = datetime.fromisoformat(response.json()["created_at"])
+    response = await client.post("/api/check/batch", json=[check_object, check_object], headers=headers)
+    assert response.json()["created"] == 2
+
+    day = created_at.date()
+    url = f"/api/check/stats?createdAtFrom={day}T00:00:00&createdAtTo={day}T23:59:59.999999"
+    from_rollup = (await client.get(url, headers=headers)).json()
+    assert from_rollup["entries"]
+
+    monkeypatch.setattr(config, "STATS_USE_ROLLUP", False)
+    from_checks = (await client.get(url, headers=headers)).json()
+    assert from_rollup == from_checks
+
+    await rebuild_daily_stats(session)
+    monkeypatch.setattr(config, "STATS_USE_ROLLUP", True)
+    assert (await client.get(url, headers=headers)).json() == from_checks
+
+
+@pytest.mark.asyncio
+async def test_check_stats_rollup_without_upsert(client: AsyncClient, token: str, check_object: dict, monkeypatch):
+    """
+    Test that the rollup stays correct on a database without a supported upsert,
+    where the rows of the affected days are recomputed from the checks.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    monkeypatch.setattr(stats, "UPSERTS", {})
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    day = datetime.fromisoformat(response.json()["created_at"]).date()
+    response = await client.post("/api/check/batch", json=[check_object, check_object], headers=headers)
+    assert response.json()["created"] == 2
+
+    url = f"/api/check/stats?createdAtFrom={day}T00:00:00&createdAtTo={day}T23:59:59.999999"
+    from_rollup = (await client.get(url, headers=headers)).json()
+    assert from_rollup["entries"]
+    monkeypatch.setattr(config, "STATS_USE_ROLLUP", False)
+    assert (await client.get(url, headers=headers)).json() == from_rollup
+
+
 @pytest.mark.asyncio
 async def test_get_check_another_user(client: AsyncClient, token: str, check_object: dict, user):
     """
@@ -301,3 +664,44 @@ async def test_get_check_another_user(client: AsyncClient, token: str, check_obj
 
 
 
+
+
+@pytest.mark.asyncio
+async def test_read_check_not_on_replica_yet(client: AsyncClient, token: str, check_object: dict, lagging_replica):
+    """
+    Test that a new check missing on the replica is read from the primary, by id and by its view links.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    check_id = response.json()["id"]
+
+    response = await client.get(f"/api/check/find/{check_id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json()["id"] == check_id
+    response = await client.get(f"/{check_id}/txt")
+    assert response.status_code == status.HTTP_200_OK, response.text
+
+    response = await client.get("/api/check/find/999999", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND, response.text
+
+
+@pytest.mark.asyncio
+async def test_cached_view_opens_no_read_session(client: AsyncClient, token: str, check_object: dict,
+                                                 lagging_replica):
+    """
+    Test that a view served from the view cache, or answered with 304, does not open a read session.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    check_id = response.json()["id"]
+
+    response = await client.get(f"/{check_id}/html")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert len(lagging_replica) == 1
+
+    response = await client.get(f"/{check_id}/html")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    response = await client.get(f"/{check_id}/html", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert len(lagging_replica) == 1
@@ -2,6 +2,11 @@ import pytest
 from httpx import AsyncClient
 from fastapi import status
 
+from src.conf.config import config
+from src.services.qr import QRFormatEnum, qr_view_key
+from src.services.render import render_latency
+from src.services.view_cache import view_cache
+
 
 @pytest.mark.asyncio
 async def test_show_check_html_success(client: AsyncClient, token: str, check_object: dict):
@@ -98,3 +103,107 @@ async def test_show_check_qr_not_found(client: AsyncClient, token: str):
     assert response.status_code == status.HTTP_404_NOT_FOUND, response.text
     data = response.json()
     assert data["detail"] == f"Check ID: {invalid_check_id} not found"
+
+
+@pytest.mark.asyncio
+async def test_show_check_txt_is_cached(client: AsyncClient, token: str, check_object: dict):
+    """
+    Test that a repeated TXT fetch is served from the view cache with the same ETag,
+    and that a different line width is a different view.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    check_id = response.json()["id"]
+
+    first = await client.get(f"/{check_id}/txt?line_width=32")
+    hits = view_cache.hits
+    second = await client.get(f"/{check_id}/txt?line_width=32")
+    assert second.status_code == status.HTTP_200_OK, second.text
+    assert view_cache.hits == hits + 1
+    assert second.text == first.text
+    assert second.headers["etag"] == first.headers["etag"]
+    assert "last-modified" in second.headers
+
+    wide = await client.get(f"/{check_id}/txt?line_width=40")
+    assert wide.headers["etag"] != first.headers["etag"]
+
+
+@pytest.mark.asyncio
+async def test_show_check_views_not_modified(client: AsyncClient, token: str, check_object: dict):
+    """
+    Test that conditional requests for an unchanged view get 304 without a body.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    check_id = response.json()["id"]
+
+    for path in (f"/{check_id}/html", f"/{check_id}/txt", f"/{check_id}/qr-code?mode=txt"):
+        response = await client.get(path)
+        assert response.status_code == status.HTTP_200_OK, response.text
+
+        response = await client.get(path, headers={"If-None-Match": response.headers["etag"]})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+
+        response = await client.get(path, headers={"If-Modified-Since": response.headers["last-modified"]})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        response = await client.get(path, headers={"If-None-Match": '"other"'})
+        assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_show_check_qr_svg(client: AsyncClient, token: str, check_object: dict):
+    """
+    Test retrieving a QR code of a check as SVG.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    check_id = response.json()["id"]
+
+    response = await client.get(f"/{check_id}/qr-code?mode=txt&format=svg")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers["content-type"] == "image/svg+xml"
+    assert response.text.startswith("<svg")
+
+
+@pytest.mark.asyncio
+async def test_qr_code_rendered_at_creation(client: AsyncClient, token: str, check_object: dict, monkeypatch):
+    """
+    Test that with QR_EAGER the QR codes are in the view cache right after the check is created.
+    """
+    monkeypatch.setattr(config, "QR_EAGER", True)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    check_id = response.json()["id"]
+
+    assert view_cache.backend.get(qr_view_key(check_id, "html", QRFormatEnum.png)) is not None
+    assert view_cache.backend.get(qr_view_key(check_id, "txt", QRFormatEnum.png)) is not None
+    hits = view_cache.hits
+    response = await client.get(f"/{check_id}/qr-code?mode=html")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert view_cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_render_latency_recorded(client: AsyncClient, token: str, check_object: dict):
+    """
+    Test that every view renderer records its latency once per render.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    check_id = response.json()["id"]
+    counts = {name: render_latency[name].count for name in ("html", "txt", "qr")}
+
+    for path in (f"/{check_id}/html", f"/{check_id}/txt", f"/{check_id}/qr-code"):
+        response = await client.get(path)
+        assert response.status_code == status.HTTP_200_OK, response.text
+
+    for name, count in counts.items():
+        assert render_latency[name].count == count + 1
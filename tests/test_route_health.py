@@ -0,0 +1,32 @@
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+from sqlalchemy import text
+
+from src.database.db import DatabaseSessionManager
+
+
+@pytest.mark.asyncio
+async def test_healthchecker(client: AsyncClient):
+    """
+    Test that the health check reaches the database.
+    """
+    response = await client.get("/api/healthchecker")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == {"message": "App is healthy"}
+
+
+@pytest.mark.asyncio
+async def test_session_manager_close(tmp_path):
+    """
+    Test that a closed session manager releases its engine and opens no more sessions.
+    """
+    manager = DatabaseSessionManager(f"sqlite+aiosqlite:///{tmp_path / 'close.db'}")
+    async with manager.session() as session:
+        assert (await session.execute(text("SELECT 1"))).scalar_one() == 1
+
+    await manager.close()
+    assert manager.pool_stats() == {"pool": None}
+    with pytest.raises(Exception, match="Session is not initialized"):
+        async with manager.session():
+            pass
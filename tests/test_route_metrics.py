@@ -0,0 +1,108 @@
+import os
+
+import httpx
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from fastapi import FastAPI, status
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from main import app
+from src.conf.config import config
+from src.routes import metrics
+from src.services import profiling
+from src.services.profiling import ProfilingMiddleware, instrument_engine
+
+
+@pytest_asyncio.fixture()
+async def profiled_client(client, session):
+    instrument_engine(session.bind)
+    transport = httpx.ASGITransport(app=ProfilingMiddleware(app))
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as profiled:
+        yield profiled
+
+
+@pytest.mark.asyncio
+async def test_server_timing(profiled_client: AsyncClient, token: str, check_object: dict):
+    """
+    Test that responses carry the request, database and render timings.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await profiled_client.post("/api/check/", json=check_object, headers=headers)
+    check_id = response.json()["id"]
+
+    response = await profiled_client.get(f"/api/check/find/{check_id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    timing = response.headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert 'desc="1 statements"' in timing
+
+    response = await profiled_client.get(f"/{check_id}/txt?line_width=33")
+    render = dict(part.strip().split(";dur=") for part in response.headers["server-timing"].split(",")
+                  if part.strip().startswith("render"))
+    assert float(render["render"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_profile_header(profiled_client: AsyncClient, token: str, tmp_path, monkeypatch):
+    """
+    Test that only a request with the profiling secret in the header is profiled into PROFILING_DIR,
+    and only the latest PROFILING_MAX_FILES profiles are kept.
+    """
+    monkeypatch.setattr(config, "PROFILING_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "PROFILING_SECRET", "s3cret")
+    monkeypatch.setattr(config, "PROFILING_MAX_FILES", 2)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await profiled_client.get("/api/check/stats", headers={**headers, config.PROFILING_HEADER: "1"})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert config.PROFILING_HEADER not in response.headers
+    assert os.listdir(tmp_path) == []
+
+    names = []
+    for _ in range(3):
+        response = await profiled_client.get("/api/check/stats",
+                                             headers={**headers, config.PROFILING_HEADER: "s3cret"})
+        assert response.status_code == status.HTTP_200_OK, response.text
+        names.append(response.headers[config.PROFILING_HEADER])
+        os.utime(tmp_path / names[-1], (len(names), len(names)))
+    assert sorted(os.listdir(tmp_path)) == sorted(names[1:])
+
+
+@pytest.mark.asyncio
+async def test_metrics(profiled_client: AsyncClient, token: str):
+    """
+    Test that /metrics exposes the per-route timings and the cache figures in the Prometheus format,
+    and is only served with METRICS_ENABLED.
+    """
+    await profiled_client.get("/api/check/select", headers={"Authorization": f"Bearer {token}"})
+    assert (await profiled_client.get("/metrics")).status_code == status.HTTP_404_NOT_FOUND
+
+    metrics_app = FastAPI()
+    metrics_app.include_router(metrics.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=metrics_app), base_url="http://testserver") as c:
+        response = await c.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = response.text.splitlines()
+    assert "# TYPE checkbox_request_duration_seconds histogram" in lines
+    assert any(line.startswith('checkbox_request_duration_seconds_count{method="GET",route="/api/check/select"}')
+               for line in lines)
+    assert any(line.startswith('checkbox_cache_hits_total{cache="token"}') for line in lines)
+    assert any(line.startswith("checkbox_db_pool_size ") for line in lines)
+
+
+@pytest.mark.asyncio
+async def test_failed_statement_timing(session):
+    """
+    Test that a failing statement leaves no start time behind and the next statements are still timed.
+    """
+    instrument_engine(session.bind)
+    async with session.bind.connect() as connection:
+        with pytest.raises(OperationalError):
+            await connection.execute(text("SELECT * FROM missing_table"))
+        count = profiling.statement_latency.count
+        await connection.execute(text("SELECT 1"))
+        assert profiling.statement_latency.count == count + 1
+        assert "query_started" not in connection.sync_connection.info
@@ -0,0 +1,65 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+
+def check_with(*products) -> dict:
+    return {
+        "payment": {"amount": 10000.0, "type": "cash"},
+        "products": [{"name": name, "price": price, "quantity": quantity} for name, price, quantity in products],
+    }
+
+
+@pytest.mark.asyncio
+async def test_top_products(client: AsyncClient, token: str):
+    """
+    Test that the top products are summed over all checks and ordered by the requested metric.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    for body in (check_with(("Tea", 20, 5), ("Cake", 100, 1)),
+                 check_with(("Tea", 20, 3), ("Coffee", 45, 2)),
+                 check_with(("Cake", 100, 2))):
+        response = await client.post("/api/check/", json=body, headers=headers)
+        assert response.status_code == status.HTTP_201_CREATED, response.text
+
+    response = await client.get("/api/products/top?metric=revenue&limit=2", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    top = response.json()
+    assert [product["name"] for product in top] == ["Cake", "Tea"]
+    assert float(top[0]["revenue"]) == 300.0
+    assert top[0]["checks"] == 2
+
+    response = await client.get("/api/products/top?metric=quantity", headers=headers)
+    top = response.json()
+    assert [product["name"] for product in top] == ["Tea", "Cake", "Coffee"]
+    assert float(top[0]["quantity"]) == 8.0
+
+    tomorrow = (datetime.now() + timedelta(days=1)).isoformat()
+    response = await client.get(f"/api/products/top?createdAtFrom={tomorrow}", headers=headers)
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_product_breakdown(client: AsyncClient, token: str):
+    """
+    Test that the breakdown streams every product once, in the same order as the top list.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    for body in (check_with(("Soup", 80, 1), ("Bread", 15, 4)),
+                 check_with(("Soup", 80, 2))):
+        response = await client.post("/api/check/", json=body, headers=headers)
+        assert response.status_code == status.HTTP_201_CREATED, response.text
+
+    response = await client.get("/api/products/breakdown?metric=revenue", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    breakdown = [json.loads(line) for line in response.text.splitlines()]
+
+    assert {"Soup", "Bread"} <= {product["name"] for product in breakdown}
+    assert len(breakdown) == len({product["name"] for product in breakdown})
+
+    top = (await client.get("/api/products/top?metric=revenue&limit=100", headers=headers)).json()
+    assert breakdown == top
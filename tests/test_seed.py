@@ -0,0 +1,46 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.database.models import Base, Check, CheckDailyStats, Product
+from src.repository.seed import seed_database
+
+
+async def seeded_rows(path, **kwargs) -> tuple[list, list, int]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine)() as db:
+        result = await seed_database(db, "password hash", **kwargs)
+        checks = (await db.execute(select(Check.__table__).order_by(Check.id))).all()
+        products = (await db.execute(select(Product.__table__).order_by(Product.id))).all()
+        rolled_up = await db.scalar(select(func.sum(CheckDailyStats.count)))
+    await engine.dispose()
+    assert result.checks == len(checks) and result.products == len(products)
+    return checks, products, rolled_up
+
+
+@pytest.mark.asyncio
+async def test_seed_is_deterministic(tmp_path):
+    """
+    Test that the same seed generates the same checks and products, consistent with their totals and rollup.
+    """
+    options = {"users": 3, "checks": 200, "seed": 7, "max_products": 5, "days": 30, "end": date(2024, 6, 1),
+               "batch_size": 64}
+    checks, products, rolled_up = await seeded_rows(tmp_path / "first.db", **options)
+    assert (checks, products) == (await seeded_rows(tmp_path / "second.db", **options))[:2]
+
+    assert len(checks) == 200 and rolled_up == 200
+    assert all(date(2024, 5, 2) <= check.created_at.date() < date(2024, 6, 1) for check in checks)
+    lines: dict[int, list] = {}
+    for product in products:
+        lines.setdefault(product.check_id, []).append(product)
+    for check in checks:
+        assert 1 <= len(lines[check.id]) <= 5
+        assert check.total == sum(product.total for product in lines[check.id])
+        assert check.rest == check.payment_amount - check.total >= 0
+
+    other_checks, _, _ = await seeded_rows(tmp_path / "other.db", **{**options, "seed": 8})
+    assert other_checks != checks
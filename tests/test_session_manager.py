@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import text
+
+from src.database.db import DatabaseSessionManager, is_replica_session
+
+
+async def database_name(session) -> str:
+    result = await session.execute(text("SELECT file FROM pragma_database_list WHERE name = 'main'"))
+    return result.scalar_one().rsplit("/", 1)[-1]
+
+
+@pytest.mark.asyncio
+async def test_read_sessions_round_robin(tmp_path):
+    """
+    Test that read sessions take the replicas in turns and write sessions stay on the primary.
+    """
+    manager = DatabaseSessionManager(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+                                     [f"sqlite+aiosqlite:///{tmp_path / name}" for name in ("a.db", "b.db")])
+    names = []
+    for _ in range(4):
+        async with manager.read_session() as session:
+            names.append(await database_name(session))
+            assert is_replica_session(session)
+    async with manager.session() as session:
+        primary = await database_name(session)
+    await manager.close()
+
+    assert names == ["a.db", "b.db", "a.db", "b.db"]
+    assert primary == "primary.db"
+
+
+@pytest.mark.asyncio
+async def test_read_sessions_least_connections(tmp_path):
+    """
+    Test that a read session goes to the replica with the fewest sessions in use.
+    """
+    manager = DatabaseSessionManager(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+                                     [f"sqlite+aiosqlite:///{tmp_path / name}" for name in ("a.db", "b.db")],
+                                     strategy="least_connections")
+    async with manager.read_session() as first:
+        async with manager.read_session() as second:
+            assert {await database_name(first), await database_name(second)} == {"a.db", "b.db"}
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_read_session_falls_back_to_primary(tmp_path):
+    """
+    Test that reads go to the primary when the replica can not be reached, and the replica is skipped afterwards.
+    """
+    manager = DatabaseSessionManager(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+                                     [f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}"])
+    async with manager.read_session() as session:
+        assert await database_name(session) == "primary.db"
+        assert not is_replica_session(session)
+    assert manager.pool_stats()["replicas"][0]["available"] is False
+
+    async with manager.read_session() as session:
+        assert await database_name(session) == "primary.db"
+    await manager.close()
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+from src.conf.config import config
+from src.services import slow_query
+from src.services.slow_query import instrument_slow_queries, parameter_shape, redact_plan, start_slow_query_log, \
+    stop_slow_query_log
+
+
+@pytest.fixture()
+def slow_query_log(session, tmp_path, monkeypatch):
+    log_file = tmp_path / "slow.log"
+    monkeypatch.setattr(config, "SLOW_QUERY_MS", 1e-6)
+    monkeypatch.setattr(config, "SLOW_QUERY_LOG_FILE", str(log_file))
+    instrument_slow_queries(session.bind)
+    start_slow_query_log()
+    yield log_file
+    stop_slow_query_log()
+
+
+def test_parameter_shape():
+    """
+    Test that only the types of the bind parameters are described.
+    """
+    assert parameter_shape((1, "secret", None)) == "(int, str, NoneType)"
+    assert parameter_shape({"name": "secret"}) == "{name: str}"
+    assert parameter_shape([(1, "a"), (2, "b")], executemany=True) == "2 x (int, str)"
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log(client: AsyncClient, token: str, check_object: dict, slow_query_log):
+    """
+    Test that statements over the threshold are logged with their tag and parameter types but no values.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    check_id = response.json()["id"]
+    response = await client.get(f"/api/check/find/{check_id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    response = await client.get("/api/check/select", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+
+    stop_slow_query_log()
+    log = slow_query_log.read_text()
+    for tag in ("check_by_id", "checks_by_filter", "checks_by_filter_products", "checks_by_filter_count"):
+        assert f"tag={tag} " in log
+    assert "duration_ms=" in log
+    assert "params=(int" in log
+    assert check_object["products"][0]["name"] not in log
+
+
+def test_redact_plan():
+    """
+    Test that the values in the conditions of a plan are replaced and the figures of the plan are kept.
+    """
+    plan = ("Index Scan using ix_checks on checks  (cost=0.42..8.44 rows=1 width=64) (actual rows=1 loops=1)\n"
+            "  Index Cond: ((user_id = 7) AND (created_at >= '2024-01-01 00:00:00'::timestamp))\n"
+            "  Filter: ((payment_type)::text = 'cash'::text)\n"
+            "  Rows Removed by Filter: 3\n"
+            "  Buffers: shared hit=4")
+    assert redact_plan(plan).splitlines() == [
+        "Index Scan using ix_checks on checks  (cost=0.42..8.44 rows=1 width=64) (actual rows=1 loops=1)",
+        "  Index Cond: ((user_id = ?) AND (created_at >= ?::timestamp))",
+        "  Filter: ((payment_type)::text = ?::text)",
+        "  Rows Removed by Filter: 3",
+        "  Buffers: shared hit=4",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_explain_once_per_tag(client: AsyncClient, token: str, check_object: dict, slow_query_log,
+                                    monkeypatch):
+    """
+    Test that a slow tagged statement is explained in a background task at most once per tag and interval.
+    """
+    monkeypatch.setattr(slow_query, "EXPLAIN_PREFIXES", {"sqlite": "EXPLAIN QUERY PLAN "})
+    monkeypatch.setattr(slow_query, "_explained", {})
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.post("/api/check/", json=check_object, headers=headers)
+    check_id = response.json()["id"]
+
+    for _ in range(3):
+        response = await client.get(f"/api/check/find/{check_id}", headers=headers)
+        assert response.status_code == status.HTTP_200_OK, response.text
+    await asyncio.gather(*slow_query._explain_tasks)
+    monkeypatch.setattr(config, "SLOW_QUERY_EXPLAIN_INTERVAL", 0)
+    await client.get(f"/api/check/find/{check_id}", headers=headers)
+    await asyncio.gather(*slow_query._explain_tasks)
+
+    stop_slow_query_log()
+    log = slow_query_log.read_text()
+    assert log.count("explain tag=check_by_id\n") == 2
+    assert "failed" not in log